@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from api_yamdb.db import (check_connections, reset_replica_pin,
+                                  set_sqlite_pragmas)
+        from . import signals  # noqa: F401
+
+        request_started.connect(reset_replica_pin)
+        request_started.connect(check_connections)
+        connection_created.connect(set_sqlite_pragmas)
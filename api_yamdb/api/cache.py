@@ -0,0 +1,114 @@
+import hashlib
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+# Заголовки, которые сохраняются вместе с закэшированным ответом.
+CACHED_HEADERS = ('Allow', 'Vary', 'ETag', 'Last-Modified')
+
+
+def get_response_cache():
+    return caches[settings.RESPONSE_CACHE]
+
+
+def get_tag_key(tag):
+    return f'response_tag_{tag}'
+
+
+def get_title_tag(title_id):
+    # id из URL приводится к числу: /titles/01/ — тот же объект, что и
+    # /titles/1/, и его ответы должны сбрасываться вместе.
+    try:
+        title_id = int(title_id)
+    except (TypeError, ValueError):
+        pass
+    return f'title_{title_id}'
+
+
+def get_tag_versions(tags):
+    """
+    Возвращает текущие версии тегов.
+
+    Версия — случайная строка, а не счётчик: если ключ тега вытеснен из
+    кэша, новая версия не совпадёт ни с одной из прежних, и старые
+    ответы не вернутся.
+    """
+    cache = get_response_cache()
+    keys = [get_tag_key(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, uuid4().hex, timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def invalidate_tags(*tags):
+    """Сбрасывает все ответы, помеченные хотя бы одним из тегов."""
+    get_response_cache().set_many(
+        {get_tag_key(tag): uuid4().hex for tag in tags}, timeout=None
+    )
+
+
+def invalidate_titles(title_ids):
+    """Сбрасывает ответы с произведениями после изменений в обход сигналов."""
+    if title_ids:
+        invalidate_tags(
+            *(get_title_tag(title_id) for title_id in title_ids), 'titles'
+        )
+
+
+def is_cacheable(request):
+    # Аутентификация в API только по JWT, поэтому запрос без заголовка
+    # Authorization анонимный.
+    return (
+        request.method == 'GET'
+        and 'HTTP_AUTHORIZATION' not in request.META
+    )
+
+
+def get_cache_key(request, tags):
+    params = sorted(
+        (name, sorted(values)) for name, values in request.GET.lists()
+    )
+    key = '|'.join((
+        request.build_absolute_uri(request.path),
+        repr(params),
+        request.META.get('HTTP_ACCEPT', ''),
+        *get_tag_versions(tags),
+    ))
+    return f'response_{hashlib.md5(key.encode()).hexdigest()}'
+
+
+def get_cached_response(request, key):
+    cached = get_response_cache().get(key)
+    if cached is None:
+        return None
+    status, content_type, content, headers = cached
+    not_modified = get_conditional_response(
+        request,
+        etag=headers.get('ETag'),
+        last_modified=parse_http_date_safe(headers.get('Last-Modified', '')),
+    )
+    if not_modified is not None:
+        return not_modified
+    response = HttpResponse(content, content_type=content_type, status=status)
+    for name, value in headers.items():
+        response[name] = value
+    return response
+
+
+def cache_response(key, response):
+    headers = {
+        name: response[name] for name in CACHED_HEADERS if name in response
+    }
+    get_response_cache().set(
+        key,
+        (response.status_code, response['Content-Type'], response.content,
+         headers),
+        timeout=settings.RESPONSE_CACHE_TIMEOUT,
+    )
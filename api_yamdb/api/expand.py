@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.db.models.expressions import RawSQL
+
+from reviews.models import Comment, Review
+
+EXPAND_PARAM = 'expand'
+EXPAND_REVIEWS = 'reviews'
+EXPAND_COMMENTS = 'comments'
+
+
+def get_expand(request):
+    """Возвращает множество связей, запрошенных через ?expand=."""
+    if request is None:
+        return frozenset()
+    values = request.query_params.get(EXPAND_PARAM, '')
+    expand = {value.strip() for value in values.split(',') if value.strip()}
+    if EXPAND_COMMENTS in expand:
+        expand.add(EXPAND_REVIEWS)
+    return frozenset(expand & {EXPAND_REVIEWS, EXPAND_COMMENTS})
+
+
+def latest_per_group(model, group_field, group_ids, limit):
+    """
+    Отбирает не более limit самых новых объектов в каждой из групп.
+
+    Для каждой группы строится подзапрос с LIMIT, который читает по
+    индексу (группа, pub_date, id) только limit строк, и подзапросы
+    объединяются через UNION ALL в одну выборку. Стоимость зависит от
+    числа групп на странице, а не от числа объектов в группах.
+    """
+    arms, params = [], []
+    for idx, group_id in enumerate(group_ids):
+        latest = model.objects.filter(**{group_field: group_id}).order_by(
+            '-pub_date', '-id'
+        ).values('pk')[:limit]
+        sql, arm_params = latest.query.sql_with_params()
+        # SQLite не разрешает ORDER BY и LIMIT в частях UNION, поэтому
+        # каждая часть обёрнута в подзапрос.
+        arms.append(f'SELECT * FROM ({sql}) AS latest_{idx}')
+        params.extend(arm_params)
+    if not arms:
+        return model.objects.none()
+    return model.objects.filter(
+        pk__in=RawSQL(' UNION ALL '.join(arms), params)
+    ).order_by('-pub_date', '-id')
+
+
+def group_by(objects, items, key, to_attr):
+    """Раскладывает items по объектам в атрибут to_attr по полю key."""
+    groups = {obj.pk: [] for obj in objects}
+    for item in items:
+        groups[getattr(item, key)].append(item)
+    for obj in objects:
+        setattr(obj, to_attr, groups[obj.pk])
+
+
+def attach_latest(titles, expand):
+    """
+    Добавляет произведениям страницы последние отзывы, а отзывам —
+    последние комментарии, по одному запросу на каждую связь.
+    """
+    titles = list(titles)
+    if EXPAND_REVIEWS not in expand or not titles:
+        return
+    reviews = list(latest_per_group(
+        Review, 'title', [title.pk for title in titles],
+        settings.EXPAND_REVIEWS_LIMIT
+    ).select_related('author'))
+    group_by(titles, reviews, 'title_id', 'latest_reviews')
+    if EXPAND_COMMENTS in expand:
+        comments = latest_per_group(
+            Comment, 'review', [review.pk for review in reviews],
+            settings.EXPAND_COMMENTS_LIMIT
+        ).select_related('author')
+        group_by(reviews, comments, 'review_id', 'latest_comments')
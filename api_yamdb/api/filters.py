@@ -1,11 +1,57 @@
 import django_filters
+from django_filters.constants import EMPTY_VALUES
+from rest_framework import filters
 
 from reviews.models import Title
+from reviews.search import search_titles
+from reviews.slugs import category_slugs, genre_slugs
+
+
+def genre_choices():
+    return genre_slugs.choices()
+
+
+def category_choices():
+    return category_slugs.choices()
+
+
+class GenreSlugFilter(django_filters.MultipleChoiceFilter):
+    """
+    Фильтр по slug жанров через подзапрос IN по таблице связей.
+
+    В отличие от JOIN с DISTINCT, подзапрос не размножает строки. Он
+    читает связи по индексу genre_id, а произведения выбираются по
+    первичному ключу. Коррелированный EXISTS SQLite выполняет, перебирая
+    все произведения, что видно в explain_queries.
+    """
+
+    def filter(self, qs, value):
+        if not value:
+            return qs
+        genres = [genre_slugs.get(slug) for slug in value]
+        genre_ids = [genre.pk for genre in genres if genre is not None]
+        return qs.filter(pk__in=Title.genre.through.objects.filter(
+            genre_id__in=genre_ids
+        ).values('title_id'))
+
+
+class CategorySlugFilter(django_filters.ChoiceFilter):
+    """Фильтр по slug категории через category_id без JOIN."""
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        category = category_slugs.get(value)
+        if category is None:
+            return qs.none()
+        return qs.filter(category_id=category.pk)
 
 
 class TitlesFilter(django_filters.FilterSet):
-    genre = django_filters.AllValuesMultipleFilter(field_name='genre__slug')
-    category = django_filters.AllValuesFilter(field_name='category__slug')
+    # Slug проверяются по словарям reviews.slugs, а не по SELECT DISTINCT
+    # по произведениям на каждый запрос.
+    genre = GenreSlugFilter(choices=genre_choices)
+    category = CategorySlugFilter(choices=category_choices)
     year = django_filters.NumberFilter(field_name='year', lookup_expr='exact')
     name = django_filters.CharFilter(field_name='name',
                                      lookup_expr='icontains')
@@ -18,3 +64,20 @@ class TitlesFilter(django_filters.FilterSet):
             'year': ['exact'],
             'name': ['icontains'],
         }
+
+
+class TitleSearchFilter(filters.SearchFilter):
+    """Поиск по полнотекстовому индексу с сортировкой по релевантности."""
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        return search_titles(queryset, query)
+
+
+class UsernameSearchFilter(filters.SearchFilter):
+    """Поиск пользователей по началу username через индекс."""
+
+    def filter_queryset(self, request, queryset, view):
+        for term in self.get_search_terms(request):
+            queryset = queryset.username_startswith(term)
+        return queryset
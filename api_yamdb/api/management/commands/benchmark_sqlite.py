@@ -0,0 +1,147 @@
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api_yamdb.db import get_pragma_statements
+
+# Настройки SQLite по умолчанию: журнал отката и fsync на каждый COMMIT.
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'delete',
+    'synchronous': 'full',
+    'busy_timeout': 5000,
+}
+
+
+def connect(path, pragmas):
+    connection = sqlite3.connect(
+        path, isolation_level=None, check_same_thread=False
+    )
+    for statement in get_pragma_statements(pragmas):
+        connection.execute(statement)
+    return connection
+
+
+def prepare(path, pragmas, rows):
+    connection = connect(path, pragmas)
+    connection.execute(
+        'CREATE TABLE review (id INTEGER PRIMARY KEY, title_id INTEGER, '
+        'text TEXT, score INTEGER)'
+    )
+    connection.execute('CREATE INDEX review_title ON review (title_id)')
+    connection.executemany(
+        'INSERT INTO review (title_id, text, score) VALUES (?, ?, ?)',
+        ((idx % 100, f'review {idx}', idx % 10 + 1) for idx in range(rows))
+    )
+    connection.close()
+
+
+def write(path, pragmas, stop, commits):
+    """Публикует отзывы короткими транзакциями, как API."""
+    connection = connect(path, pragmas)
+    idx = 0
+    while not stop.is_set():
+        connection.execute('BEGIN IMMEDIATE')
+        connection.execute(
+            'INSERT INTO review (title_id, text, score) VALUES (?, ?, ?)',
+            (idx % 100, f'new review {idx}', idx % 10 + 1)
+        )
+        connection.execute('COMMIT')
+        commits.append(1)
+        idx += 1
+    connection.close()
+
+
+def read(path, pragmas, stop, latencies, errors):
+    """Считает рейтинг произведения, как список произведений."""
+    connection = connect(path, pragmas)
+    idx = 0
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            connection.execute(
+                'SELECT SUM(score), COUNT(*) FROM review WHERE title_id = ?',
+                (idx % 100,)
+            ).fetchone()
+        except sqlite3.OperationalError:
+            errors.append(1)
+        else:
+            latencies.append(time.perf_counter() - started)
+        idx += 1
+    connection.close()
+
+
+def run(path, pragmas, readers, writers, duration):
+    stop = threading.Event()
+    commits, latencies, errors = [], [], []
+    threads = [
+        threading.Thread(target=write, args=(path, pragmas, stop, commits))
+        for _ in range(writers)
+    ] + [
+        threading.Thread(
+            target=read, args=(path, pragmas, stop, latencies, errors)
+        )
+        for _ in range(readers)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+    return {
+        'commits': len(commits) / duration,
+        'reads': len(latencies) / duration,
+        'p50': statistics.median(latencies) * 1000 if latencies else 0,
+        'p99': (
+            latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0
+        ),
+        'max': latencies[-1] * 1000 if latencies else 0,
+        'errors': len(errors),
+    }
+
+
+class Command(BaseCommand):
+    help = ('Compare reader/writer concurrency of SQLite with default '
+            'settings and with SQLITE_PRAGMAS')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=5,
+                            help='Seconds each profile runs')
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=1)
+        parser.add_argument('--rows', type=int, default=100000,
+                            help='Reviews created before the run')
+        parser.add_argument('--dir', default=None,
+                            help='Directory for the database files, on the '
+                                 'same disk as the production database')
+
+    def handle(self, *args, **kwargs):
+        profiles = (
+            ('default', DEFAULT_PRAGMAS),
+            ('SQLITE_PRAGMAS', settings.SQLITE_PRAGMAS),
+        )
+        self.stdout.write(
+            f'{"profile":<16}{"commits/s":>11}{"reads/s":>10}'
+            f'{"p50 ms":>9}{"p99 ms":>9}{"max ms":>9}{"errors":>8}'
+        )
+        with tempfile.TemporaryDirectory(dir=kwargs['dir']) as directory:
+            for name, pragmas in profiles:
+                path = str(Path(directory) / f'{name}.sqlite3')
+                prepare(path, pragmas, kwargs['rows'])
+                result = run(
+                    path, pragmas, kwargs['readers'], kwargs['writers'],
+                    kwargs['duration']
+                )
+                self.stdout.write(
+                    f'{name:<16}{result["commits"]:>11.0f}'
+                    f'{result["reads"]:>10.0f}{result["p50"]:>9.2f}'
+                    f'{result["p99"]:>9.2f}{result["max"]:>9.2f}'
+                    f'{result["errors"]:>8}'
+                )
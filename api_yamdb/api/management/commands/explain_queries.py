@@ -0,0 +1,217 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from rest_framework.test import APIRequestFactory
+
+from api.views import (CategoryViewSet, CommentViewSet, GenreViewSet,
+                       ReviewsViewSet, TitlesViewSet, UserViewSet)
+from reviews.models import Comment, Genre
+from reviews.slugs import category_slugs, genre_slugs
+from users.models import CustomUser
+
+# Списки API с характерными фильтрами. Значения в фигурных скобках
+# подставляются из данных в БД, см. get_sample().
+SCENARIOS = (
+    (TitlesViewSet, {}, {}),
+    (TitlesViewSet, {}, {'page': '2'}),
+    (TitlesViewSet, {}, {'year': '{year}'}),
+    (TitlesViewSet, {}, {'category': '{category}'}),
+    (TitlesViewSet, {}, {'category': '{category}', 'year': '{year}'}),
+    (TitlesViewSet, {}, {'genre': '{genre}'}),
+    (TitlesViewSet, {}, {'search': '{name}'}),
+    (TitlesViewSet, {}, {'expand': 'comments'}),
+    (ReviewsViewSet, {'title_id': '{title_id}'}, {}),
+    (ReviewsViewSet, {'title_id': '{title_id}'}, {'cursor': ''}),
+    (CommentViewSet,
+     {'title_id': '{title_id}', 'review_id': '{review_id}'}, {}),
+    (CategoryViewSet, {}, {}),
+    (GenreViewSet, {}, {}),
+    (UserViewSet, {}, {'search': '{username}'}),
+)
+
+
+def get_sample():
+    comment = Comment.objects.select_related(
+        'review__title__category'
+    ).filter(review__title__category__isnull=False).first()
+    genre = Genre.objects.filter(title__isnull=False).first()
+    user = CustomUser.objects.first()
+    if comment is None or genre is None or user is None:
+        raise CommandError(
+            'The database needs a title with a category, a genre, a review '
+            'and a comment, load data with load_data first'
+        )
+    title = comment.review.title
+    return {
+        'title_id': title.pk,
+        'review_id': comment.review_id,
+        'year': title.year,
+        'category': title.category.slug,
+        'genre': genre.slug,
+        'name': title.name.split()[0],
+        'username': user.username[:3],
+    }
+
+
+def run_list(viewset, kwargs, params):
+    """Выполняет list() вьюсета и возвращает выполненные SELECT-запросы."""
+    view = viewset(
+        action_map={'get': 'list'}, args=(), kwargs=kwargs, format_kwarg=None
+    )
+    request = view.initialize_request(
+        APIRequestFactory().get('/', params)
+    )
+    view.request = request
+    view.headers = {}
+    queries = []
+
+    def record(execute, sql, sql_params, many, context):
+        queries.append((sql, sql_params))
+        return execute(sql, sql_params, many, context)
+
+    with connection.execute_wrapper(record):
+        view.list(request, **kwargs)
+    return [
+        (sql, sql_params) for sql, sql_params in queries
+        if sql.lstrip().upper().startswith('SELECT')
+    ]
+
+
+LIMIT_PATTERN = re.compile(r'\sLIMIT\s+\d+(\s+OFFSET\s+\d+)?\s*$')
+
+
+def explain_sqlite(cursor, sql, params):
+    """
+    Возвращает план и его шаги, которые читают таблицу целиком.
+
+    SCAN по покрывающему индексу допустим. Остальные SCAN допустимы,
+    только если запрос верхнего уровня ограничен LIMIT и строки уже идут
+    в порядке ORDER BY (по первичному ключу или индексу, без временного
+    B-дерева): тогда перебор останавливается на странице.
+    """
+    cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+    rows = [(row[1], row[-1]) for row in cursor.fetchall()]
+    # Подзапросы во FROM выполняются как сопрограммы, и их перебор —
+    # это чтение уже отобранных строк, а не таблицы.
+    subqueries = {
+        step.split()[-1] for _, step in rows
+        if step.startswith(('CO-ROUTINE ', 'MATERIALIZE '))
+    }
+    # Остановиться на LIMIT может только внешний цикл соединения —
+    # первый шаг верхнего уровня.
+    outer = next((
+        step for parent, step in rows
+        if parent == 0 and step.startswith(('SCAN ', 'SEARCH '))
+    ), None)
+    limited = LIMIT_PATTERN.search(sql) is not None and not any(
+        parent == 0 and step.startswith('USE TEMP B-TREE FOR ORDER BY')
+        for parent, step in rows
+    )
+    scans = [
+        step for _, step in rows
+        if step.startswith('SCAN ')
+        and ' VIRTUAL TABLE ' not in step
+        and ' USING COVERING INDEX ' not in step
+        and step.split()[1] not in subqueries
+        and not (limited and step is outer)
+    ]
+    return [step for _, step in rows], scans
+
+
+def find_postgresql_scans(node, limited=False):
+    """
+    Собирает узлы плана PostgreSQL, которые читают таблицу целиком.
+
+    Это Seq Scan и просмотр индекса без Index Cond, отбирающий строки
+    фильтром, если над узлом нет Limit.
+    """
+    node_type = node['Node Type']
+    limited = limited or node_type == 'Limit'
+    scans = []
+    full_scan = node_type == 'Seq Scan' or (
+        node_type in ('Index Scan', 'Index Only Scan')
+        and 'Index Cond' not in node
+    )
+    if full_scan and not limited and (
+        node_type == 'Seq Scan' or 'Filter' in node
+    ):
+        scans.append(f'{node_type} on {node["Relation Name"]}')
+    for child in node.get('Plans', ()):
+        scans.extend(find_postgresql_scans(child, limited))
+    return scans
+
+
+def explain_postgresql(cursor, sql, params):
+    """
+    Возвращает план и полные просмотры таблиц.
+
+    На маленьких таблицах планировщик выбирает Seq Scan даже при
+    подходящем индексе, поэтому план строится с enable_seqscan = off.
+    """
+    with transaction.atomic():
+        cursor.execute('SET LOCAL enable_seqscan = off')
+        cursor.execute(f'EXPLAIN {sql}', params)
+        plan = [row[0] for row in cursor.fetchall()]
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        root = cursor.fetchone()[0][0]['Plan']
+    return plan, find_postgresql_scans(root)
+
+
+EXPLAINERS = {
+    'sqlite': explain_sqlite,
+    'postgresql': explain_postgresql,
+}
+
+
+class Command(BaseCommand):
+    help = ('Run EXPLAIN for the queries of API list endpoints and report '
+            'full table scans')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verbose-plans',
+            action='store_true',
+            help='Print the plan of every query, not only of full scans'
+        )
+
+    def handle(self, *args, **kwargs):
+        explain = EXPLAINERS.get(connection.vendor)
+        if explain is None:
+            raise CommandError(
+                f'EXPLAIN is not supported for {connection.vendor}'
+            )
+        sample = get_sample()
+        # Словари slug читаются целиком один раз и живут в памяти, см.
+        # reviews.slugs; в запросах списков их загрузка не участвует.
+        category_slugs.load()
+        genre_slugs.load()
+        failures = 0
+        for viewset, view_kwargs, params in SCENARIOS:
+            view_kwargs = {
+                name: str(value).format(**sample)
+                for name, value in view_kwargs.items()
+            }
+            params = {
+                name: value.format(**sample) for name, value in params.items()
+            }
+            queries = run_list(viewset, view_kwargs, params)
+            self.stdout.write(
+                f'{viewset.__name__} {params}: {len(queries)} queries'
+            )
+            with connection.cursor() as cursor:
+                for sql, sql_params in queries:
+                    plan, scans = explain(cursor, sql, sql_params)
+                    failures += bool(scans)
+                    self.report(sql, plan, scans, kwargs['verbose_plans'])
+        if failures:
+            raise CommandError(f'{failures} queries scan whole tables')
+        self.stdout.write(self.style.SUCCESS('No full table scans found'))
+
+    def report(self, sql, plan, scans, verbose):
+        if not scans and not verbose:
+            return
+        style = self.style.ERROR if scans else self.style.NOTICE
+        self.stdout.write(style(f'  {sql}'))
+        for step in plan:
+            self.stdout.write(f'    {step}')
@@ -1,8 +1,15 @@
+import hashlib
+from calendar import timegm
+
 from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from rest_framework.exceptions import MethodNotAllowed
-from rest_framework import filters
+from rest_framework import filters, status
 
 from reviews.models import Review, Title
+from .cache import (cache_response, get_cache_key, get_cached_response,
+                    is_cacheable)
 from .permissions import IsAdminOrReadOnly, IsAdminAuthorModeratorOrReadOnly
 
 
@@ -13,7 +20,15 @@ class GetTitleMixin:
 
 class GetReviewMixin:
     def get_review(self):
-        return get_object_or_404(Review, id=self.kwargs['review_id'])
+        # Отзыв ищется один раз за запрос и только среди отзывов
+        # произведения из URL.
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review,
+                id=self.kwargs['review_id'],
+                title_id=self.kwargs['title_id']
+            )
+        return self._review
 
 
 class UpdateMethodMixin:
@@ -33,3 +48,73 @@ class IsAdminAuthorModeratorOrReadOnlyMixin:
 
 class SearchFilterMixin:
     filter_backends = (filters.SearchFilter,)
+
+
+class ConditionalGetMixin:
+    """
+    Отвечает 304 на GET с совпавшим If-None-Match или If-Modified-Since.
+
+    ETag строится по штампу версии из get_version() и полному пути
+    запроса, поэтому проверка стоит одного запроса к БД и обходится без
+    выборки объектов и сериализации.
+    """
+
+    def get_version(self):
+        raise NotImplementedError
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_get(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_get(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def conditional_get(self, handler, request, *args, **kwargs):
+        version = self.get_version()
+        if version is None:
+            return handler(request, *args, **kwargs)
+        modified, count = version
+        etag = quote_etag(hashlib.md5(
+            f'{request.get_full_path()}:{modified.isoformat()}:{count}'
+            .encode()
+        ).hexdigest())
+        last_modified = timegm(modified.utctimetuple())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is not None:
+            return response
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+class AnonymousCacheMixin:
+    """
+    Кэширует успешные ответы на анонимные GET-запросы.
+
+    Ответ ищется в кэше до аутентификации и остального стека DRF. Ключ
+    включает версии тегов из get_cache_tags(), а api.signals меняет эти
+    версии при изменении данных.
+    """
+    cache_tags = ()
+
+    def get_cache_tags(self):
+        return self.cache_tags
+
+    def dispatch(self, request, *args, **kwargs):
+        if not is_cacheable(request):
+            return super().dispatch(request, *args, **kwargs)
+        self.kwargs = kwargs
+        key = get_cache_key(request, self.get_cache_tags())
+        response = get_cached_response(request, key)
+        if response is not None:
+            return response
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response.render()
+            cache_response(key, response)
+        return response
@@ -0,0 +1,169 @@
+import json
+from base64 import b64decode, b64encode
+from functools import partial
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (BasePagination, LimitOffsetPagination,
+                                       PageNumberPagination)
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from reviews.counters import get_cached_count
+
+# Параметры, которые не влияют на количество объектов в выборке.
+NON_FILTER_PARAMS = ('page', 'page_size', 'limit', 'offset', 'expand')
+
+
+def get_filter_params(request):
+    params = request.query_params.copy()
+    for name in NON_FILTER_PARAMS:
+        params.pop(name, None)
+    return params
+
+
+class CachedCountPaginator(Paginator):
+
+    def __init__(self, *args, params, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.params = params
+
+    @cached_property
+    def count(self):
+        return get_cached_count(self.object_list, self.params)
+
+
+class CachedCountPagination(PageNumberPagination):
+    """
+    Постраничная пагинация с кэшированным количеством объектов.
+
+    Количество кэшируется по набору параметров фильтрации и сбрасывается
+    при изменении модели, см. reviews.counters.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.django_paginator_class = partial(
+            CachedCountPaginator, params=get_filter_params(request)
+        )
+        return super().paginate_queryset(queryset, request, view)
+
+
+class CachedCountLimitOffsetPagination(LimitOffsetPagination):
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.params = get_filter_params(request)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_count(self, queryset):
+        return get_cached_count(queryset, self.params)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Курсорная пагинация по ключу (pub_date, id) от новых к старым.
+
+    Страница выбирается условием по ключу вместо OFFSET и без COUNT(*),
+    поэтому глубокие страницы стоят столько же, сколько первая.
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        position, self.reverse = self.decode_cursor(request)
+
+        if self.reverse:
+            queryset = queryset.order_by('pub_date', 'id')
+        else:
+            queryset = queryset.order_by('-pub_date', '-id')
+        if position is not None:
+            pub_date, pk = position
+            if self.reverse:
+                queryset = queryset.filter(
+                    Q(pub_date__gt=pub_date)
+                    | Q(pub_date=pub_date, id__gt=pk)
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(pub_date__lt=pub_date)
+                    | Q(pub_date=pub_date, id__lt=pk)
+                )
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, obj, reverse):
+        token = json.dumps(
+            [obj.pub_date.isoformat(), obj.pk, reverse]
+        ).encode()
+        return replace_query_param(
+            self.base_url, self.cursor_query_param,
+            b64encode(token).decode()
+        )
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            pub_date, pk, reverse = json.loads(b64decode(encoded))
+            pub_date = parse_datetime(pub_date)
+            pk = int(pk)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if pub_date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return (pub_date, pk), bool(reverse)
+
+
+class OptionalKeysetPagination(PageNumberPagination):
+    """
+    Постраничная пагинация, которая переключается на KeysetPagination,
+    если в запросе есть параметр cursor (в том числе пустой).
+    """
+    keyset_pagination_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_pagination_class.cursor_query_param in (
+                request.query_params):
+            self.keyset = self.keyset_pagination_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -17,7 +17,7 @@ class IsAdminAuthorModeratorOrReadOnly(permissions.BasePermission):
             return (
                 request.user.role in (settings.ROLE_MODERATOR,
                                       settings.ROLE_ADMIN)
-                or obj.author == request.user
+                or obj.author_id == request.user.id
             )
         return False
 
@@ -38,3 +38,13 @@ class IsAdmin(permissions.BasePermission):
             and (request.user.role == settings.ROLE_ADMIN
                  or request.user.is_superuser)
         )
+
+
+class IsModerator(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return (
+            request.user.is_authenticated
+            and (request.user.role in (settings.ROLE_MODERATOR,
+                                       settings.ROLE_ADMIN)
+                 or request.user.is_superuser)
+        )
@@ -1,15 +1,40 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db.models import Q
 from rest_framework import status
 import re
 
 from api_yamdb.settings import VALID_USERNAME_CHARACTERS
 from users.confirmation_code import get_confirmation_code
 from .exceptions import CustomValidation
+from .expand import EXPAND_COMMENTS, EXPAND_REVIEWS
 from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.slugs import category_slugs, genre_slugs
 
 
 User = get_user_model()
+USERNAME_PATTERN = re.compile(VALID_USERNAME_CHARACTERS)
+MODERATION_DELETE = 'delete'
+MODERATION_EDIT = 'edit'
+
+
+class CachedSlugRelatedField(serializers.SlugRelatedField):
+    """Ищет объект по slug в словаре reviews.slugs, а не запросом к БД."""
+
+    def __init__(self, slug_cache, **kwargs):
+        self.slug_cache = slug_cache
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail('invalid')
+        obj = self.slug_cache.get(data)
+        if obj is None:
+            self.fail(
+                'does_not_exist', slug_name=self.slug_field, value=data
+            )
+        return obj
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -67,18 +92,18 @@ class CommentSerializer(serializers.ModelSerializer):
 class TitlesSerializer(serializers.ModelSerializer):
     name = serializers.CharField(max_length=256)
     rating = serializers.FloatField(read_only=True)
-    genre = serializers.SlugRelatedField(
+    genre = CachedSlugRelatedField(
+        genre_slugs,
         many=True,
         slug_field='slug',
         queryset=Genre.objects.all()
     )
 
-    category = serializers.SlugRelatedField(
+    category = CachedSlugRelatedField(
+        category_slugs,
         slug_field='slug',
         queryset=Category.objects.all()
     )
-    reviews = ReviewsSerializer(many=True, read_only=True)
-    comments = CommentSerializer(many=True, read_only=True)
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
@@ -86,13 +111,34 @@ class TitlesSerializer(serializers.ModelSerializer):
             instance.category).data
         representation['genre'] = GenreSerializer(
             instance.genre, many=True).data
+        expand = self.context.get('expand', ())
+        if EXPAND_REVIEWS in expand:
+            representation['reviews'] = self.get_reviews(instance, expand)
         return representation
 
+    def get_reviews(self, instance, expand):
+        reviews = getattr(instance, 'latest_reviews', None)
+        if reviews is None:
+            reviews = instance.reviews.select_related('author')[
+                :settings.EXPAND_REVIEWS_LIMIT]
+        data = []
+        for review in reviews:
+            review_data = ReviewsSerializer(review).data
+            if EXPAND_COMMENTS in expand:
+                comments = getattr(review, 'latest_comments', None)
+                if comments is None:
+                    comments = review.comment_set.select_related('author')[
+                        :settings.EXPAND_COMMENTS_LIMIT]
+                review_data['comments'] = CommentSerializer(
+                    comments, many=True).data
+            data.append(review_data)
+        return data
+
     class Meta:
         model = Title
         fields = (
             'id', 'name', 'year', 'rating', 'description',
-            'genre', 'category', 'reviews', 'comments'
+            'genre', 'category'
         )
 
 
@@ -110,6 +156,14 @@ class UserMeSerializer(UserSerializer):
     class Meta(UserSerializer.Meta):
         read_only_fields = ('role',)
 
+    def update(self, instance, validated_data):
+        # Сохраняются только переданные поля, чтобы не затереть
+        # параллельные изменения, например роль от администратора.
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        instance.save(update_fields=list(validated_data))
+        return instance
+
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
     username = serializers.CharField(required=True, max_length=150)
@@ -120,8 +174,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         fields = ('email', 'username',)
 
     def validate_username(self, value):
-        pattern = re.compile(VALID_USERNAME_CHARACTERS)
-        if not pattern.match(value):
+        if not USERNAME_PATTERN.match(value):
             raise serializers.ValidationError(
                 'Имя пользователя должно содержать только буквы, '
                 'цифры, точки, @, + или -'
@@ -136,17 +189,21 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         email = data.get('email')
         username = data.get('username')
 
-        if User.objects.filter(email=email, username=username).exists():
+        existing = set(User.objects.filter(
+            Q(email=email) | Q(username=username)
+        ).values_list('email', 'username')[:2])
+
+        if (email, username) in existing:
             raise CustomValidation(
                 'Пользователь успешно создан',
                 username, status_code=status.HTTP_200_OK
             )
-        if User.objects.filter(email=email).exists():
+        if any(user_email == email for user_email, _ in existing):
             raise serializers.ValidationError(
                 {'email': [f'Пользователь с таким {email} уже существует']}
             )
 
-        if User.objects.filter(username=username).exists():
+        if existing:
             raise serializers.ValidationError(
                 {'username': [
                     f'Пользователь с таким username '
@@ -168,7 +225,7 @@ class TokenSerializer(serializers.Serializer):
         confirmation_code = data.get('confirmation_code')
 
         try:
-            user = User.objects.get(username=username)
+            user = User.objects.not_deleted().get(username=username)
         except User.DoesNotExist:
             raise CustomValidation(
                 'Не существует',
@@ -182,3 +239,46 @@ class TokenSerializer(serializers.Serializer):
 
         data['user'] = user
         return data
+
+
+class ModerationSerializer(serializers.Serializer):
+    """Условия отбора отзывов или комментариев для массовой модерации."""
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False,
+        allow_empty=False, max_length=settings.MODERATION_MAX_IDS
+    )
+    author = serializers.CharField(required=False)
+    title = serializers.IntegerField(required=False, min_value=1)
+    pub_date_after = serializers.DateTimeField(required=False)
+    pub_date_before = serializers.DateTimeField(required=False)
+    action = serializers.ChoiceField(
+        choices=(MODERATION_DELETE, MODERATION_EDIT),
+        default=MODERATION_DELETE
+    )
+    text = serializers.CharField(required=False)
+
+    def validate(self, data):
+        if not data.keys() - {'action', 'text'}:
+            raise serializers.ValidationError(
+                'Укажите ids или хотя бы одно условие отбора.'
+            )
+        if data['action'] == MODERATION_EDIT and 'text' not in data:
+            raise serializers.ValidationError(
+                {'text': 'Укажите новый текст.'}
+            )
+        return data
+
+    def filter_queryset(self, queryset, title_field):
+        data = self.validated_data
+        if 'ids' in data:
+            queryset = queryset.filter(pk__in=data['ids'])
+        if 'author' in data:
+            queryset = queryset.filter(author__username=data['author'])
+        if 'title' in data:
+            queryset = queryset.filter(**{title_field: data['title']})
+        if 'pub_date_after' in data:
+            queryset = queryset.filter(pub_date__gte=data['pub_date_after'])
+        if 'pub_date_before' in data:
+            queryset = queryset.filter(pub_date__lt=data['pub_date_before'])
+        return queryset
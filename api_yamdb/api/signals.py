@@ -0,0 +1,69 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from reviews.cascade import is_deleting
+from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.versions import get_author_title_ids
+from users.models import CustomUser
+from .cache import get_title_tag, invalidate_tags, invalidate_titles
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def invalidate_title_responses(sender, instance, **kwargs):
+    invalidate_tags(get_title_tag(instance.pk), 'titles')
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_responses_on_genres_change(sender, instance, action, reverse,
+                                          **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        # Ответы с произведениями помечены и тегом жанров.
+        invalidate_tags('genres')
+    else:
+        invalidate_tags(get_title_tag(instance.pk), 'titles')
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_review_responses(sender, instance, **kwargs):
+    # Ответы удаляемого произведения сбрасывает его собственный receiver.
+    if not is_deleting(Title, instance.title_id):
+        invalidate_tags(get_title_tag(instance.title_id), 'titles')
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_responses(sender, instance, **kwargs):
+    # Комментарии встраиваются в произведения через ?expand=comments.
+    # Ответы с комментариями удаляемого отзыва сбрасываются один раз
+    # при удалении самого отзыва.
+    if is_deleting(Review, instance.review_id):
+        return
+    if Comment.review.is_cached(instance) and instance.review is not None:
+        title_id = instance.review.title_id
+    else:
+        title_id = Review.objects.filter(pk=instance.review_id).values_list(
+            'title_id', flat=True
+        ).first()
+    invalidate_tags(get_title_tag(title_id), 'titles')
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def invalidate_genre_responses(sender, instance, **kwargs):
+    invalidate_tags('genres')
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_responses(sender, instance, **kwargs):
+    invalidate_tags('categories')
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_author_responses(sender, instance, **kwargs):
+    if getattr(instance, 'username_changed', False):
+        invalidate_titles(get_author_title_ids(instance.pk))
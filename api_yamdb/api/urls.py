@@ -2,7 +2,7 @@ from rest_framework import routers
 from django.urls import include, path
 
 from .views import (CategoryViewSet, GenreViewSet, TitlesViewSet,
-                    ReviewsViewSet, CommentViewSet,
+                    ReviewsViewSet, CommentViewSet, ModerationViewSet,
                     UserViewSet, UserRegistrationViewSet, get_token)
 
 
@@ -15,6 +15,7 @@ v1_router.register(
     r'titles/(?P<title_id>\d+)/reviews/(?P<review_id>\d+)/comments',
     CommentViewSet, basename='comments'
 )
+v1_router.register(r'moderation', ModerationViewSet, basename='moderation')
 v1_router.register(r'users', UserViewSet, basename='users')
 v1_router.register(r'auth/signup', UserRegistrationViewSet, basename='auth')
 
@@ -1,27 +1,33 @@
 from django.contrib.auth import get_user_model
-from django.core.mail import send_mail
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Avg
-from rest_framework import filters, mixins, status, viewsets
+from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action, api_view
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
-from api_yamdb.settings import ADMIN_EMAIL
-from .filters import TitlesFilter
-from .mixins import (GetTitleMixin, GetReviewMixin, UpdateMethodMixin,
-                     IsAdminAuthorModeratorOrReadOnlyMixin,
+from .cache import get_title_tag, invalidate_titles
+from .expand import attach_latest, get_expand
+from .filters import TitleSearchFilter, TitlesFilter, UsernameSearchFilter
+from .pagination import (CachedCountLimitOffsetPagination,
+                         OptionalKeysetPagination)
+from .mixins import (AnonymousCacheMixin, ConditionalGetMixin,
+                     GetTitleMixin, GetReviewMixin,
+                     UpdateMethodMixin, IsAdminAuthorModeratorOrReadOnlyMixin,
                      IsAdminOrReadOnlyMixin, SearchFilterMixin)
-from .permissions import IsAdmin
+from .permissions import IsAdmin, IsModerator
 from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.moderation import delete_comments, delete_reviews, update_text
+from reviews.versions import get_title_version, get_titles_version
 from .serializers import (CategorySerializer, CommentSerializer,
-                          GenreSerializer, TitlesSerializer,
+                          GenreSerializer, ModerationSerializer,
+                          MODERATION_DELETE, TitlesSerializer,
                           ReviewsSerializer, UserRegistrationSerializer,
                           UserSerializer, UserMeSerializer, TokenSerializer)
+from users.emails import send_email
 from users.get_tokens_for_user import get_tokens_for_user
+from users.purge import has_little_content, purge_user, soft_delete_user
 from users.confirmation_code import (generate_confirmation_code,
                                      store_confirmation_code)
 
@@ -29,7 +35,8 @@ from users.confirmation_code import (generate_confirmation_code,
 User = get_user_model()
 
 
-class CategoryViewSet(mixins.ListModelMixin,
+class CategoryViewSet(AnonymousCacheMixin,
+                      mixins.ListModelMixin,
                       mixins.CreateModelMixin,
                       mixins.DestroyModelMixin,
                       IsAdminOrReadOnlyMixin,
@@ -38,6 +45,7 @@ class CategoryViewSet(mixins.ListModelMixin,
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     search_fields = ('name',)
+    cache_tags = ('categories',)
 
     def get_object(self):
         return get_object_or_404(Category, slug=self.kwargs.get('slug'))
@@ -47,7 +55,8 @@ class CategoryViewSet(mixins.ListModelMixin,
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class GenreViewSet(mixins.ListModelMixin,
+class GenreViewSet(AnonymousCacheMixin,
+                   mixins.ListModelMixin,
                    mixins.CreateModelMixin,
                    mixins.DestroyModelMixin,
                    IsAdminOrReadOnlyMixin,
@@ -56,6 +65,7 @@ class GenreViewSet(mixins.ListModelMixin,
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     search_fields = ('name',)
+    cache_tags = ('genres',)
 
     def get_object(self):
         return get_object_or_404(Genre, slug=self.kwargs.get('slug'))
@@ -65,32 +75,104 @@ class GenreViewSet(mixins.ListModelMixin,
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class TitlesViewSet(UpdateMethodMixin, IsAdminOrReadOnlyMixin,
+class TitlesViewSet(AnonymousCacheMixin, ConditionalGetMixin,
+                    UpdateMethodMixin, IsAdminOrReadOnlyMixin,
                     viewsets.ModelViewSet):
-    queryset = Title.objects.all().annotate(rating=Avg('reviews__score'))
+    queryset = Title.objects.select_related('category').prefetch_related(
+        'genre'
+    )
     serializer_class = TitlesSerializer
-    filter_backends = (DjangoFilterBackend, filters.SearchFilter)
-    search_fields = ('name', 'year', 'genre__name', 'category__name')
+    filter_backends = (DjangoFilterBackend, TitleSearchFilter)
     filterset_class = TitlesFilter
 
+    # Встраиваемые отзывы и комментарии выбираются только для
+    # произведений страницы, см. api.expand.attach_latest.
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None:
+            attach_latest(page, get_expand(self.request))
+        return page
+
+    def get_object(self):
+        title = super().get_object()
+        attach_latest([title], get_expand(self.request))
+        return title
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['expand'] = get_expand(self.request)
+        return context
+
+    def get_version(self):
+        if self.lookup_field in self.kwargs:
+            return get_title_version(self.kwargs[self.lookup_field])
+        return get_titles_version()
+
+    def get_cache_tags(self):
+        # В произведениях выводятся названия жанров и категорий.
+        if self.lookup_field in self.kwargs:
+            return (
+                get_title_tag(self.kwargs[self.lookup_field]),
+                'genres', 'categories'
+            )
+        return ('titles', 'genres', 'categories')
+
 
-class ReviewsViewSet(GetTitleMixin, UpdateMethodMixin,
+class ReviewsViewSet(AnonymousCacheMixin, ConditionalGetMixin,
+                     GetTitleMixin, UpdateMethodMixin,
                      IsAdminAuthorModeratorOrReadOnlyMixin,
                      viewsets.ModelViewSet):
-    queryset = Review.objects.all()
     serializer_class = ReviewsSerializer
+    pagination_class = OptionalKeysetPagination
+
+    def get_queryset(self):
+        return Review.objects.filter(
+            title_id=self.kwargs['title_id']
+        ).select_related('author')
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if not page:
+            # Пустая страница может означать, что произведения нет: 404.
+            self.get_title()
+        return page
+
+    def get_version(self):
+        return get_title_version(self.kwargs['title_id'])
+
+    def get_cache_tags(self):
+        return (get_title_tag(self.kwargs['title_id']),)
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user, title=self.get_title())
 
 
-class CommentViewSet(GetReviewMixin, UpdateMethodMixin,
+class CommentViewSet(AnonymousCacheMixin, ConditionalGetMixin,
+                     GetReviewMixin, UpdateMethodMixin,
                      IsAdminAuthorModeratorOrReadOnlyMixin,
                      viewsets.ModelViewSet):
     serializer_class = CommentSerializer
+    pagination_class = OptionalKeysetPagination
 
     def get_queryset(self):
-        return Comment.objects.filter(review=self.get_review())
+        return Comment.objects.filter(
+            review_id=self.kwargs['review_id'],
+            review__title_id=self.kwargs['title_id']
+        ).select_related('author')
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if not page:
+            # Пустая страница может означать, что отзыва нет: тогда 404.
+            self.get_review()
+        return page
+
+    def get_version(self):
+        # Штамп произведения сдвигается и при изменении комментариев.
+        return get_title_version(self.kwargs['title_id'])
+
+    def get_cache_tags(self):
+        return (get_title_tag(self.kwargs['title_id']),)
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user, review=self.get_review())
@@ -112,31 +194,38 @@ class UserRegistrationViewSet(ModelViewSet):
     def send_confirmation_email(self, username, email):
         confirmation_code = generate_confirmation_code()
         store_confirmation_code(username, confirmation_code)
-        send_mail(
+        send_email(
             subject='Код подтверждения',
             message=confirmation_code,
-            from_email=ADMIN_EMAIL,
-            recipient_list=[email],
-            fail_silently=True,
+            recipient=email,
         )
 
 
-class UserViewSet(UpdateMethodMixin, SearchFilterMixin, ModelViewSet):
-    queryset = User.objects.all()
+class UserViewSet(UpdateMethodMixin, ModelViewSet):
+    queryset = User.objects.not_deleted()
     serializer_class = UserSerializer
-    pagination_class = LimitOffsetPagination
-    search_fields = ('^username',)
+    pagination_class = CachedCountLimitOffsetPagination
+    filter_backends = (UsernameSearchFilter,)
     lookup_field = 'username'
     lookup_url_kwarg = 'username'
     permission_classes = [IsAdmin]
 
+    def perform_destroy(self, instance):
+        # Автора с большим количеством записей каскад Django удалял бы
+        # дольше запроса, поэтому его удаляет команда purge_users.
+        soft_delete_user(instance)
+        if has_little_content(instance):
+            invalidate_titles(purge_user(instance))
+
     @action(detail=False, methods=['get', 'patch'],
             permission_classes=[IsAuthenticated])
     def me(self, request):
         user = request.user
         if request.method == 'PATCH':
+            # request.user может быть взят из кэша аутентификации и
+            # устареть, поэтому изменяется запись, прочитанная из БД.
             serializer = UserMeSerializer(
-                user, data=request.data, partial=True
+                User.objects.get(pk=user.pk), data=request.data, partial=True
             )
             serializer.is_valid(raise_exception=True)
             serializer.save()
@@ -145,6 +234,44 @@ class UserViewSet(UpdateMethodMixin, SearchFilterMixin, ModelViewSet):
         return Response(serializer.data)
 
 
+class ModerationViewSet(viewsets.GenericViewSet):
+    """
+    Массовое удаление и правка отзывов и комментариев.
+
+    Записи отбираются по ids или условиям и обрабатываются пачками, а
+    рейтинг и кэш каждого затронутого произведения обновляются один раз.
+    """
+    serializer_class = ModerationSerializer
+    permission_classes = [IsModerator]
+
+    @action(detail=False, methods=['post'])
+    def reviews(self, request):
+        return self.moderate(
+            Review.objects.all(), 'title_id', delete_reviews
+        )
+
+    @action(detail=False, methods=['post'])
+    def comments(self, request):
+        return self.moderate(
+            Comment.objects.all(), 'review__title_id', delete_comments
+        )
+
+    def moderate(self, queryset, title_field, delete):
+        serializer = self.get_serializer(data=self.request.data)
+        serializer.is_valid(raise_exception=True)
+        queryset = serializer.filter_queryset(queryset, title_field)
+        if serializer.validated_data['action'] == MODERATION_DELETE:
+            count, title_ids = delete(queryset)
+            data = {'deleted': count}
+        else:
+            count, title_ids = update_text(
+                queryset, serializer.validated_data['text']
+            )
+            data = {'updated': count}
+        invalidate_titles(title_ids)
+        return Response(data, status=status.HTTP_200_OK)
+
+
 @api_view(['POST'])
 def get_token(request):
     serializer = TokenSerializer(data=request.data)
@@ -0,0 +1,88 @@
+import random
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Запрос, который уже что-то записал, дальше читает только с default.
+_request_state = threading.local()
+
+
+class ReplicaRouter:
+    """
+    Отправляет чтение на реплики из DATABASE_REPLICAS, запись — в default.
+
+    Чтение остаётся на default внутри транзакции и после первой записи
+    в запросе: реплика может ещё не получить записанные строки.
+    Пользователи и коды подтверждения всегда читаются с default: запись
+    пользователя кэшируется аутентификацией, а код проверяется сразу
+    после отправки, и отставшая реплика вернула бы старые данные.
+    """
+
+    primary_models = {'users.customuser', 'users.confirmationcode'}
+
+    def db_for_read(self, model, **hints):
+        if not settings.DATABASE_REPLICAS:
+            return None
+        if (
+            model._meta.label_lower in self.primary_models
+            or getattr(_request_state, 'wrote', False)
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        _request_state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и default.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def reset_replica_pin(**kwargs):
+    """В начале запроса снова разрешает читать с реплик."""
+    _request_state.wrote = False
+
+
+def check_connections(**kwargs):
+    """
+    Закрывает постоянные соединения, которые перестали отвечать.
+
+    При CONN_MAX_AGE соединение переживает запрос, и после перезапуска
+    сервера БД или разрыва на балансировщике следующий запрос упал бы на
+    мёртвом соединении. Проверка выполняется в начале запроса для
+    соединений с CONN_HEALTH_CHECKS, вместо закрытого Django откроет
+    новое при первом обращении.
+    """
+    for connection in connections.all():
+        if (
+            connection.connection is None
+            or connection.in_atomic_block
+            or not connection.settings_dict.get('CONN_HEALTH_CHECKS')
+        ):
+            continue
+        if not connection.is_usable():
+            connection.close()
+
+
+def get_pragma_statements(pragmas):
+    return [f'PRAGMA {name} = {value}' for name, value in pragmas.items()]
+
+
+def set_sqlite_pragmas(sender, connection, **kwargs):
+    """
+    Применяет SQLITE_PRAGMAS к каждому новому соединению с SQLite.
+
+    В режиме WAL читатели не ждут пишущую транзакцию, а с
+    synchronous=NORMAL фиксация не вызывает fsync на каждый COMMIT.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for statement in get_pragma_statements(settings.SQLITE_PRAGMAS):
+            cursor.execute(statement)
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -63,13 +64,53 @@ WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
 # Database
 
+# По умолчанию SQLite, для PostgreSQL задайте
+# DB_ENGINE=django.db.backends.postgresql и параметры подключения.
+# Соединение живёт DB_CONN_MAX_AGE секунд и переиспользуется между
+# запросами; перед запросом оно проверяется, см. api_yamdb.db.
+# Для PgBouncer в режиме transaction включите
+# DB_DISABLE_SERVER_SIDE_CURSORS.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'ENGINE': os.getenv('DB_ENGINE', 'django.db.backends.sqlite3'),
+        'NAME': os.getenv('DB_NAME', BASE_DIR / 'db.sqlite3'),
+        'USER': os.getenv('POSTGRES_USER', ''),
+        'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+        'HOST': os.getenv('DB_HOST', ''),
+        'PORT': os.getenv('DB_PORT', ''),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', '1') == '1',
+        'DISABLE_SERVER_SIDE_CURSORS': (
+            os.getenv('DB_DISABLE_SERVER_SIDE_CURSORS', '0') == '1'
+        ),
     }
 }
 
+# Реплики для чтения: хосты через запятую в DB_REPLICA_HOSTS, остальные
+# параметры как у default. В тестах реплики отражают default.
+for index, host in enumerate(
+    host for host in os.getenv('DB_REPLICA_HOSTS', '').split(',') if host
+):
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['api_yamdb.db.ReplicaRouter']
+
+# PRAGMA, которые выполняются при открытии соединения с SQLite: WAL не
+# блокирует чтение на время записи, busy_timeout — сколько миллисекунд
+# ждать занятую БД вместо ошибки database is locked.
+SQLITE_PRAGMAS = {
+    'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'wal'),
+    'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'normal'),
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 64 * 1024 * 1024)),
+    # Отрицательное значение — размер в КиБ, а не в страницах.
+    'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', -16 * 1024)),
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000)),
+}
+
 
 # Password validation
 
@@ -100,11 +141,10 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ],
 
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.'
-                                'pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.CachedCountPagination',
     'PAGE_SIZE': 5,
 
     'DEFAULT_FILTER_BACKENDS': [
@@ -112,21 +152,46 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Время жизни кэша количества объектов для пагинации, в секундах
+PAGINATION_COUNT_CACHE_TIMEOUT = 30
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=2),
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
-# Кэширование кода подтверждения
+# Кэширование
 
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
-        "LOCATION": BASE_DIR / "cache",
-
-    }
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "users": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "users",
+    },
+    "responses": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "responses",
+    },
 }
 
+# Кэш пользователей для JWT-аутентификации
+AUTH_USER_CACHE = 'users'
+AUTH_USER_CACHE_TIMEOUT = 60
+
+# Как долго словари категорий и жанров в памяти процесса живут без
+# проверки, см. reviews.slugs
+SLUG_CACHE_TIMEOUT = 60
+
+# Кэш ответов на анонимные GET-запросы. Версии тегов хранятся в том же
+# кэше, поэтому с локальным кэшем изменения сбрасывают ответы только в
+# своём процессе, а другие процессы видят их через
+# RESPONSE_CACHE_TIMEOUT. Для нескольких процессов укажите общий бэкенд
+# (Memcached, Redis).
+RESPONSE_CACHE = 'responses'
+RESPONSE_CACHE_TIMEOUT = 60
+
 # Internationalization
 
 LANGUAGE_CODE = 'ru'
@@ -151,6 +216,13 @@ AUTH_USER_MODEL = 'users.CustomUser'
 # Эмуляция почты
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
+# Очередь писем: при включении письма отправляет команда send_emails,
+# иначе письмо отправляется прямо в запросе
+EMAIL_OUTBOX_ENABLED = os.getenv('EMAIL_OUTBOX_ENABLED', '0') == '1'
+EMAIL_OUTBOX_BATCH_SIZE = 100
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 30
+EMAIL_OUTBOX_POLL_INTERVAL = 5
 
 MIN_SCORE_VALUE = 1
 MAX_SCORE_VALUE = 10
@@ -163,3 +235,25 @@ ROLE_ADMIN = 'admin'
 ROLE_USER = 'user'
 
 TIMEOUT_CONFIRMATION_CODE = 3600
+
+# Хранилище кодов подтверждения: users.confirmation_code.MemoryCodeStore
+# для одного процесса или DatabaseCodeStore для нескольких узлов
+CONFIRMATION_CODE_STORE = 'users.confirmation_code.DatabaseCodeStore'
+CONFIRMATION_CODE_STORE_MAX_SIZE = 100000
+CONFIRMATION_CODE_PURGE_INTERVAL = 300
+
+# Встраивание отзывов и комментариев в ответ по ?expand=reviews,comments
+EXPAND_REVIEWS_LIMIT = 10
+EXPAND_COMMENTS_LIMIT = 5
+
+# Массовая модерация: размер пачки одного DELETE/UPDATE и предельная
+# длина списка ids в запросе
+MODERATION_CHUNK_SIZE = 1000
+MODERATION_MAX_IDS = 10000
+
+# Удаление пользователей: пользователя, у которого отзывов и комментариев
+# больше USER_PURGE_INLINE_LIMIT, API только отключает, а удаляет команда
+# purge_users пачками по USER_PURGE_BATCH_SIZE пользователей
+USER_PURGE_INLINE_LIMIT = 100
+USER_PURGE_BATCH_SIZE = 10
+USER_PURGE_POLL_INTERVAL = 60
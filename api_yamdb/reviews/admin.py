@@ -1,5 +1,6 @@
 from django.contrib import admin
-from django.db.models import Avg
+from django.db.models import ExpressionWrapper, F, FloatField
+from django.db.models.functions import NullIf
 
 from .models import Category, Comment, Genre, Title, Review
 
@@ -15,7 +16,12 @@ class TitlesAdmin(admin.ModelAdmin):
 
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
-        queryset = queryset.annotate(average_rating=Avg('reviews__score'))
+        queryset = queryset.annotate(
+            average_rating=ExpressionWrapper(
+                F('rating_sum') * 1.0 / NullIf(F('rating_count'), 0),
+                output_field=FloatField()
+            )
+        )
         return queryset
 
     def average_rating(self, obj):
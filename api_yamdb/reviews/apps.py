@@ -1,7 +1,14 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
 
 
 class ReviewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reviews'
     verbose_name = 'Произведения'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .cascade import reset_deleting
+
+        request_started.connect(reset_deleting)
@@ -0,0 +1,45 @@
+import threading
+
+# Объекты, которые удаляются или только что удалены вместе со связанными
+# записями: ключ (модель, pk) → удаление завершено.
+_state = threading.local()
+
+
+def _get_deleting():
+    if not hasattr(_state, 'deleting'):
+        _state.deleting = {}
+    return _state.deleting
+
+
+def mark_deleting(instance):
+    """
+    Отмечает объект, удаление которого каскадом удаляет связанные записи.
+
+    Django отправляет pre_delete для всех удаляемых объектов до первого
+    DELETE, поэтому receiver связанной записи может проверить отметку и
+    не обновлять рейтинг, штамп или кэш удаляемого родителя. post_delete
+    родителя может прийти раньше, чем у связанных записей: на СУБД с
+    отложенной проверкой внешних ключей Django не упорядочивает DELETE.
+    Поэтому отметки завершённых удалений снимаются только в начале
+    следующего удаления.
+    """
+    deleting = _get_deleting()
+    for key in [key for key, done in deleting.items() if done]:
+        del deleting[key]
+    deleting[(instance._meta.label_lower, instance.pk)] = False
+
+
+def unmark_deleting(instance):
+    key = (instance._meta.label_lower, instance.pk)
+    deleting = _get_deleting()
+    if key in deleting:
+        deleting[key] = True
+
+
+def is_deleting(model, pk):
+    return (model._meta.label_lower, pk) in _get_deleting()
+
+
+def reset_deleting(**kwargs):
+    """Сбрасывает отметки, оставшиеся после прерванного удаления."""
+    _get_deleting().clear()
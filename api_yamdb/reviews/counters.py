@@ -0,0 +1,131 @@
+import hashlib
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+
+from users.models import CustomUser
+from .models import Category, Genre, TableCounter, Title
+
+# Модели, количество которых кэшируется, и модели, изменение которых
+# меняет результат фильтрации по ним.
+COUNT_DEPENDENCIES = {
+    Title: (Title, Title.genre.through, Genre, Category),
+    Category: (Category,),
+    Genre: (Genre,),
+    CustomUser: (CustomUser,),
+}
+
+
+def get_version_key(model):
+    return f'count_version_{model._meta.label_lower}'
+
+
+def get_count_version(model):
+    """
+    Возвращает версию кэша количеств модели.
+
+    Версия — случайная строка, а не счётчик: после вытеснения ключа
+    счётчик начался бы заново и вернул бы количества, закэшированные
+    под прежними номерами.
+    """
+    key = get_version_key(model)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_counts(changed_model):
+    """Сбрасывает кэш количеств, зависящих от изменённой модели."""
+    cache.set_many({
+        get_version_key(model): uuid4().hex
+        for model, dependencies in COUNT_DEPENDENCIES.items()
+        if changed_model in dependencies
+    }, timeout=None)
+
+
+def get_cached_count(queryset, params):
+    """
+    Количество объектов queryset из кэша.
+
+    Ключ строится из модели, версии её зависимостей и нормализованных
+    параметров фильтрации. Для выборки без условий используется
+    TableCounter вместо COUNT(*).
+    """
+    model = queryset.model
+    if model not in COUNT_DEPENDENCIES:
+        return queryset.count()
+    if not queryset.query.where and not queryset.query.distinct:
+        return get_table_count(model)
+    normalized = '&'.join(
+        f'{name}={",".join(sorted(params.getlist(name)))}'
+        for name in sorted(params)
+    )
+    key = 'count_{}_{}_{}'.format(
+        model._meta.label_lower,
+        get_count_version(model),
+        hashlib.md5(normalized.encode()).hexdigest()
+    )
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, timeout=settings.PAGINATION_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def get_table_count(model):
+    label = model._meta.label_lower
+    count = TableCounter.objects.filter(model=label).values_list(
+        'count', flat=True
+    ).first()
+    if count is None:
+        count = model.objects.count()
+        TableCounter.objects.update_or_create(
+            model=label, defaults={'count': count}
+        )
+    return count
+
+
+def change_table_count(model, delta):
+    TableCounter.objects.filter(model=model._meta.label_lower).update(
+        count=F('count') + delta
+    )
+
+
+def reset_table_counts():
+    """Удаляет счётчики, чтобы они пересчитались при следующем запросе."""
+    TableCounter.objects.all().delete()
+    for model in COUNT_DEPENDENCIES:
+        invalidate_counts(model)
+
+
+def find_count_mismatches():
+    """Возвращает [(модель, сохранённое, фактическое)] для разошедшихся."""
+    stored = dict(TableCounter.objects.values_list('model', 'count'))
+    mismatches = []
+    for model in COUNT_DEPENDENCIES:
+        label = model._meta.label_lower
+        if label not in stored:
+            continue
+        actual = model.objects.count()
+        if stored[label] != actual:
+            mismatches.append((label, stored[label], actual))
+    return mismatches
+
+
+def rebuild_table_counts():
+    """
+    Записывает в счётчики фактические количества строк.
+
+    Счётчик расходится с таблицей после удаления или вставки в обход
+    сигналов, а также если запись строки совпала с созданием счётчика.
+    """
+    for model in COUNT_DEPENDENCIES:
+        TableCounter.objects.update_or_create(
+            model=model._meta.label_lower,
+            defaults={'count': model.objects.count()}
+        )
+        invalidate_counts(model)
@@ -0,0 +1,334 @@
+import csv
+import json
+import os
+from itertools import islice
+
+from django.db import transaction
+
+from reviews.counters import reset_table_counts
+from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.ratings import recalculate_ratings
+from reviews.search import rebuild_index
+from reviews.versions import touch_titles
+from users.models import CustomUser
+
+BATCH_SIZE = 1000
+
+
+class CsvImportError(Exception):
+    pass
+
+
+class OffsetReader:
+    """Отдаёт строки файла csv-ридеру, запоминая байтовое смещение."""
+
+    def __init__(self, file, offset):
+        self.file = file
+        self.offset = offset
+
+    def __iter__(self):
+        for line in self.file:
+            self.offset += len(line)
+            yield line.decode('utf-8')
+
+
+def read_batches(file_path, batch_size, offset=0):
+    """
+    Читает CSV пачками по batch_size строк.
+
+    Вместе с каждой пачкой возвращается смещение в байтах, с которого
+    начинается следующая, поэтому чтение можно продолжить с этого места.
+    """
+    with open(file_path, 'rb') as csvfile:
+        lines = OffsetReader(csvfile, 0)
+        reader = csv.reader(lines)
+        fieldnames = next(reader, None)
+        if fieldnames is None:
+            return
+        if offset > lines.offset:
+            csvfile.seek(offset)
+            lines.offset = offset
+            reader = csv.reader(lines)
+        while True:
+            batch = [
+                dict(zip(fieldnames, values))
+                for values in islice(reader, batch_size)
+            ]
+            if not batch:
+                return
+            yield batch, lines.offset
+
+
+class Checkpoint:
+    """JSON-файл с позицией загрузки каждого CSV-файла."""
+
+    def __init__(self, path):
+        self.path = path
+        self.state = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as file:
+                self.state = json.load(file)
+
+    def get(self, file_name):
+        return self.state.get(file_name, {})
+
+    def save(self, file_name, **values):
+        self.state.setdefault(file_name, {}).update(values)
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.state, file)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        self.state = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class BulkImporter:
+    """
+    Загружает CSV пачками через bulk_create.
+
+    Внешние ключи проверяются одним запросом на пачку, а не отдельным
+    запросом на строку: из БД читаются только pk, на которые ссылается
+    пачка, поэтому память не растёт с размером таблиц.
+    """
+    model = None
+    ignore_conflicts = False
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+
+    def prepare(self, batch):
+        pass
+
+    def build(self, row):
+        raise NotImplementedError
+
+    def save(self, objects, ignore_conflicts=False):
+        self.model.objects.bulk_create(
+            objects,
+            batch_size=self.batch_size,
+            ignore_conflicts=self.ignore_conflicts or ignore_conflicts
+        )
+
+    def finish(self):
+        # bulk_create не вызывает сигналы, поэтому счётчики строк
+        # пересчитываются заново.
+        reset_table_counts()
+
+    def load(self, file_path, checkpoint=None):
+        """
+        Загружает файл, фиксируя каждую пачку отдельной транзакцией.
+
+        С checkpoint после каждой пачки сохраняются смещение и id последней
+        строки, и повторный запуск продолжает загрузку с этого места.
+        """
+        file_name = os.path.basename(file_path)
+        state = checkpoint.get(file_name) if checkpoint else {}
+        if state.get('done'):
+            return 0
+        batches = read_batches(
+            file_path, self.batch_size, state.get('offset', 0)
+        )
+        return self.load_batches(file_name, batches, checkpoint)
+
+    def load_batches(self, file_name, batches, checkpoint=None):
+        """
+        Сохраняет пачки строк вида (rows, offset).
+
+        offset=None означает, что пачка заканчивается не на границе,
+        с которой можно продолжить загрузку, и checkpoint не обновляется.
+        После возобновления все пачки до первого сохранённого checkpoint
+        вставляются с ignore_conflicts: они могли быть зафиксированы до
+        сбоя. Начало загрузки файла тоже отмечается в checkpoint, иначе
+        сбой до первого checkpoint не отличить от новой загрузки.
+        """
+        state = checkpoint.get(file_name) if checkpoint else {}
+        resuming = 'offset' in state
+        if checkpoint and not resuming:
+            checkpoint.save(file_name, offset=0)
+        count = 0
+        for batch, offset in batches:
+            self.prepare(batch)
+            objects = [self.build(row) for row in batch]
+            with transaction.atomic():
+                self.save(objects, ignore_conflicts=resuming)
+            if checkpoint and offset is not None:
+                checkpoint.save(
+                    file_name, offset=offset, last_id=batch[-1].get('id')
+                )
+                resuming = False
+            count += len(batch)
+        self.finish()
+        if checkpoint:
+            checkpoint.save(file_name, done=True)
+        return count
+
+    @staticmethod
+    def existing_pks(model, batch, column):
+        pks = {int(row[column]) for row in batch}
+        return set(
+            model.objects.filter(pk__in=pks).values_list('pk', flat=True)
+        )
+
+    @staticmethod
+    def resolve(pks, pk, name):
+        if pk not in pks:
+            raise CsvImportError(f'{name} {pk} does not exist')
+        return pk
+
+
+class CategoryImporter(BulkImporter):
+    model = Category
+    ignore_conflicts = True
+
+    def build(self, row):
+        return Category(id=int(row['id']), name=row['name'], slug=row['slug'])
+
+
+class GenreImporter(BulkImporter):
+    model = Genre
+    ignore_conflicts = True
+
+    def build(self, row):
+        return Genre(id=int(row['id']), name=row['name'], slug=row['slug'])
+
+
+class TitleImporter(BulkImporter):
+    model = Title
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        super().__init__(batch_size)
+        self.title_genres = []
+
+    def prepare(self, batch):
+        self.categories = self.existing_pks(Category, batch, 'category')
+        slugs = {
+            slug for row in batch if row.get('genre')
+            for slug in row['genre'].split('|')
+        }
+        self.genres = dict(
+            Genre.objects.filter(slug__in=slugs).values_list('slug', 'pk')
+        )
+
+    def build(self, row):
+        title_id = int(row['id'])
+        slugs = row['genre'].split('|') if row.get('genre') else []
+        for slug in slugs:
+            self.title_genres.append(Title.genre.through(
+                title_id=title_id,
+                genre_id=self.resolve_slug(slug)
+            ))
+        return Title(
+            id=title_id,
+            name=row['name'],
+            year=int(row['year']),
+            description=row.get('description', ''),
+            category_id=self.resolve(
+                self.categories, int(row['category']), 'Category'
+            )
+        )
+
+    def resolve_slug(self, slug):
+        try:
+            return self.genres[slug]
+        except KeyError:
+            raise CsvImportError(f'Genre {slug} does not exist')
+
+    def save(self, objects, ignore_conflicts=False):
+        super().save(objects, ignore_conflicts)
+        Title.genre.through.objects.bulk_create(
+            self.title_genres,
+            batch_size=self.batch_size,
+            ignore_conflicts=ignore_conflicts
+        )
+        self.title_genres = []
+
+    def finish(self):
+        super().finish()
+        rebuild_index()
+
+
+class GenreTitleImporter(BulkImporter):
+    model = Title.genre.through
+
+    def prepare(self, batch):
+        self.titles = self.existing_pks(Title, batch, 'title_id')
+        self.genres = self.existing_pks(Genre, batch, 'genre_id')
+
+    def build(self, row):
+        return self.model(
+            title_id=self.resolve(self.titles, int(row['title_id']), 'Title'),
+            genre_id=self.resolve(self.genres, int(row['genre_id']), 'Genre')
+        )
+
+    def finish(self):
+        super().finish()
+        rebuild_index()
+        touch_titles()
+
+
+class UserImporter(BulkImporter):
+    model = CustomUser
+
+    def build(self, row):
+        user = CustomUser(
+            id=int(row['id']),
+            username=row['username'],
+            username_lower=row['username'].lower(),
+            email=CustomUser.objects.normalize_email(row['email']),
+            role=row['role'],
+            bio=row.get('bio', ''),
+            first_name=row.get('first_name', ''),
+            last_name=row.get('last_name', '')
+        )
+        user.set_unusable_password()
+        return user
+
+
+class ReviewImporter(BulkImporter):
+    model = Review
+
+    def prepare(self, batch):
+        self.titles = self.existing_pks(Title, batch, 'title_id')
+        self.users = self.existing_pks(CustomUser, batch, 'author')
+
+    def build(self, row):
+        return Review(
+            id=int(row['id']),
+            title_id=self.resolve(self.titles, int(row['title_id']), 'Title'),
+            text=row['text'],
+            author_id=self.resolve(self.users, int(row['author']), 'User'),
+            score=int(row['score']),
+            pub_date=row['pub_date']
+        )
+
+    def finish(self):
+        super().finish()
+        # Рейтинг по той же причине пересчитывается один раз после
+        # загрузки всех отзывов.
+        recalculate_ratings()
+
+
+class CommentImporter(BulkImporter):
+    model = Comment
+
+    def prepare(self, batch):
+        self.reviews = self.existing_pks(Review, batch, 'review_id')
+        self.users = self.existing_pks(CustomUser, batch, 'author')
+
+    def build(self, row):
+        return Comment(
+            id=int(row['id']),
+            review_id=self.resolve(
+                self.reviews, int(row['review_id']), 'Review'
+            ),
+            text=row['text'],
+            author_id=self.resolve(self.users, int(row['author']), 'User'),
+            pub_date=row['pub_date']
+        )
+
+    def finish(self):
+        super().finish()
+        touch_titles()
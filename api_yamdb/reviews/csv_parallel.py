@@ -0,0 +1,182 @@
+import csv
+import io
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from reviews.csv_import import OffsetReader
+
+CHUNK_SIZE = 4 * 1024 * 1024
+MAX_PENDING_CHUNKS = 8
+
+DEPENDENCIES = {
+    'titles': {'category', 'genre'},
+    'genre_title': {'titles', 'genre'},
+    'review': {'titles', 'users'},
+    'comments': {'review', 'users'},
+}
+
+
+def schedule(file_names):
+    """
+    Упорядочивает файлы так, чтобы каждый шёл после своих зависимостей.
+
+    Среди готовых к загрузке файлов сохраняется исходный порядок.
+    """
+    pending = list(file_names)
+    order = []
+    while pending:
+        ready = [
+            name for name in pending
+            if not DEPENDENCIES.get(name, set()) & set(pending)
+        ]
+        if not ready:
+            raise ValueError(f'Cyclic dependencies between {pending}')
+        order.append(ready[0])
+        pending.remove(ready[0])
+    return order
+
+
+def split_ranges(file_path, chunk_size, offset=0):
+    """
+    Делит CSV на диапазоны байт по границам записей.
+
+    Перевод строки считается границей записи, если перед ним чётное
+    количество кавычек: так многострочные значения в кавычках не
+    разрезаются между диапазонами.
+    """
+    with open(file_path, 'rb') as csvfile:
+        lines = OffsetReader(csvfile, 0)
+        fieldnames = next(csv.reader(lines), None)
+        if fieldnames is None:
+            return None, []
+        start = max(offset, lines.offset)
+        csvfile.seek(start)
+        ranges = []
+        position = range_start = start
+        quotes = 0
+        for line in csvfile:
+            position += len(line)
+            quotes += line.count(b'"')
+            if quotes % 2 == 0 and position - range_start >= chunk_size:
+                ranges.append((range_start, position))
+                range_start = position
+        if position > range_start:
+            ranges.append((range_start, position))
+    return fieldnames, ranges
+
+
+def parse_range(file_path, fieldnames, start, end):
+    with open(file_path, 'rb') as csvfile:
+        csvfile.seek(start)
+        text = csvfile.read(end - start).decode('utf-8')
+    reader = csv.reader(io.StringIO(text, newline=''))
+    return [dict(zip(fieldnames, values)) for values in reader]
+
+
+class ParallelLoader:
+    """
+    Разбирает CSV в пуле процессов, а пишет в БД в одном потоке.
+
+    Диапазоны всех файлов отправляются в пул в порядке schedule(),
+    поэтому разбор следующих файлов идёт, пока пишутся предыдущие.
+    Число разобранных, но ещё не записанных диапазонов ограничено
+    max_pending, что держит потребление памяти постоянным.
+    """
+
+    def __init__(self, importers, workers=None, chunk_size=CHUNK_SIZE,
+                 max_pending=MAX_PENDING_CHUNKS):
+        self.importers = importers
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.max_pending = max_pending
+
+    def load(self, file_paths, checkpoint=None, on_loaded=None):
+        order = schedule(file_paths)
+        queues = {name: queue.Queue() for name in order}
+        slots = threading.BoundedSemaphore(self.max_pending)
+        stop = threading.Event()
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            producer = threading.Thread(
+                target=self.submit_ranges,
+                args=(pool, order, file_paths, queues, slots, stop,
+                      checkpoint),
+                daemon=True,
+            )
+            producer.start()
+            try:
+                for name in order:
+                    file_name = os.path.basename(file_paths[name])
+                    if checkpoint and checkpoint.get(file_name).get('done'):
+                        continue
+                    started = time.monotonic()
+                    importer = self.importers[name]
+                    batches = self.collect(
+                        queues[name], slots, importer.batch_size
+                    )
+                    count = importer.load_batches(
+                        file_name, batches, checkpoint
+                    )
+                    if on_loaded:
+                        on_loaded(
+                            file_name, count, time.monotonic() - started
+                        )
+            finally:
+                stop.set()
+                for _ in range(self.max_pending):
+                    try:
+                        slots.release()
+                    except ValueError:
+                        break
+                producer.join()
+
+    def submit_ranges(self, pool, order, file_paths, queues, slots, stop,
+                      checkpoint):
+        for name in order:
+            try:
+                self.submit_file(
+                    pool, file_paths[name], queues[name], slots, stop,
+                    checkpoint
+                )
+            except Exception as error:
+                queues[name].put(error)
+                return
+            if stop.is_set():
+                return
+            queues[name].put(None)
+
+    def submit_file(self, pool, file_path, ranges, slots, stop, checkpoint):
+        state = (
+            checkpoint.get(os.path.basename(file_path)) if checkpoint else {}
+        )
+        if state.get('done'):
+            return
+        fieldnames, offsets = split_ranges(
+            file_path, self.chunk_size, state.get('offset', 0)
+        )
+        for start, end in offsets:
+            slots.acquire()
+            if stop.is_set():
+                return
+            future = pool.submit(
+                parse_range, file_path, fieldnames, start, end
+            )
+            ranges.put((future, end))
+
+    @staticmethod
+    def collect(ranges, slots, batch_size):
+        while True:
+            item = ranges.get()
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                raise item
+            future, end = item
+            rows = future.result()
+            slots.release()
+            for start in range(0, len(rows), batch_size):
+                last = start + batch_size >= len(rows)
+                yield rows[start:start + batch_size], end if last else None
@@ -1,12 +1,29 @@
 import os
 import csv
+import time
 
 from django.core.management.base import BaseCommand
 from django.db import transaction
 
+from reviews.csv_import import (BATCH_SIZE, CategoryImporter, Checkpoint,
+                                CommentImporter, GenreImporter,
+                                GenreTitleImporter, ReviewImporter,
+                                TitleImporter, UserImporter)
+from reviews.csv_parallel import ParallelLoader
 from reviews.models import Title, Genre, Category, Review, Comment
 from users.models import CustomUser
 
+BULK_IMPORTERS = {
+    'category': CategoryImporter,
+    'genre': GenreImporter,
+    'titles': TitleImporter,
+    'genre_title': GenreTitleImporter,
+    'users': UserImporter,
+    'review': ReviewImporter,
+    'comments': CommentImporter,
+}
+CHECKPOINT_FILE = '.load_data_checkpoint.json'
+
 
 class Command(BaseCommand):
     help = 'Load data from CSV files into the database'
@@ -17,10 +34,44 @@ class Command(BaseCommand):
             type=str,
             help='The folder containing the CSV files'
         )
+        parser.add_argument(
+            '--bulk',
+            action='store_true',
+            help='Load files in batches with bulk_create'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Number of rows per batch in bulk mode'
+        )
+        parser.add_argument(
+            '--chunked',
+            action='store_true',
+            help=('Commit every batch separately and resume an interrupted '
+                  'import from the checkpoint file (implies --bulk)')
+        )
+        parser.add_argument(
+            '--checkpoint',
+            type=str,
+            help=f'Checkpoint file path, {CHECKPOINT_FILE} in the folder '
+                 f'by default'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help=('Parse files in a pool of this many processes, loading '
+                  'independent files concurrently (implies --bulk)')
+        )
 
-    @transaction.atomic
     def handle(self, *args, **kwargs):
         folder_path = kwargs['folder_path']
+        checkpoint = None
+        if kwargs['chunked']:
+            checkpoint = Checkpoint(
+                kwargs['checkpoint']
+                or os.path.join(folder_path, CHECKPOINT_FILE)
+            )
 
         file_map = {
             'category': self.load_categories,
@@ -31,21 +82,76 @@ class Command(BaseCommand):
             'review': self.load_reviews,
             'comments': self.load_comments,
         }
-
+        importers = None
+
+        if kwargs['bulk'] or checkpoint or kwargs['workers']:
+            importers = {
+                file_name: importer(kwargs['batch_size'])
+                for file_name, importer in BULK_IMPORTERS.items()
+            }
+            file_map = {
+                file_name: self.bulk_loader(importer, checkpoint)
+                for file_name, importer in importers.items()
+            }
+
+        if kwargs['workers']:
+            parallel_loader = ParallelLoader(importers, kwargs['workers'])
+
+            def load_all(file_paths):
+                parallel_loader.load(file_paths, checkpoint, self.report)
+        else:
+            def load_all(file_paths):
+                for file_name, file_path in file_paths.items():
+                    file_map[file_name](file_path)
+
+        if checkpoint:
+            self.load_files(folder_path, file_map, load_all, checkpoint)
+        else:
+            with transaction.atomic():
+                self.load_files(folder_path, file_map, load_all)
+
+    def load_files(self, folder_path, file_map, load_all, checkpoint=None):
         try:
-            for file_name, load_function in file_map.items():
+            file_paths = {}
+            for file_name in file_map:
                 file_path = os.path.join(folder_path, f'{file_name}.csv')
                 if os.path.exists(file_path):
-                    load_function(file_path)
+                    file_paths[file_name] = file_path
                 else:
                     self.stdout.write(self.style.WARNING(
                         f'{file_name}.csv not found in the folder')
                     )
+            load_all(file_paths)
 
             self.stdout.write(self.style.SUCCESS('Data imported successfully'))
+            if checkpoint:
+                checkpoint.clear()
         except Exception as e:
             self.stdout.write(self.style.ERROR(f'Error importing data: {e}'))
-            transaction.set_rollback(True)
+            if checkpoint:
+                self.stdout.write(self.style.WARNING(
+                    f'Progress is saved in {checkpoint.path}, run the '
+                    f'command again to resume')
+                )
+            else:
+                transaction.set_rollback(True)
+
+    def bulk_loader(self, importer, checkpoint=None):
+        def load(file_path):
+            started = time.monotonic()
+            count = importer.load(file_path, checkpoint)
+            self.report(
+                os.path.basename(file_path), count,
+                time.monotonic() - started
+            )
+        return load
+
+    def report(self, file_name, count, elapsed):
+        rate = count / elapsed if elapsed else count
+        self.stdout.write(
+            f'{file_name}: {count} rows in {elapsed:.2f}s '
+            f'({rate:.0f} rows/sec)'
+        )
 
     def load_categories(self, file_path):
         with open(file_path, newline='', encoding='utf-8') as csvfile:
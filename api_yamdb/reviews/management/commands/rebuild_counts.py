@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.counters import find_count_mismatches, rebuild_table_counts
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or check stored table row counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report outdated counters, do not fix them'
+        )
+
+    def handle(self, *args, **kwargs):
+        if not kwargs['check']:
+            rebuild_table_counts()
+            self.stdout.write(self.style.SUCCESS('Table counts rebuilt'))
+            return
+
+        mismatches = find_count_mismatches()
+        for label, stored, actual in mismatches:
+            self.stdout.write(self.style.WARNING(
+                f'{label}: stored {stored}, actual {actual}')
+            )
+        if mismatches:
+            raise CommandError(f'{len(mismatches)} counters are outdated')
+        self.stdout.write(self.style.SUCCESS('All table counts are valid'))
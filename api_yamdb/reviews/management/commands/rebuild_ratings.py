@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.ratings import find_rating_mismatches, recalculate_ratings
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or check stored title ratings against reviews'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report titles with outdated ratings, do not fix them'
+        )
+
+    def handle(self, *args, **kwargs):
+        if not kwargs['check']:
+            updated = recalculate_ratings()
+            self.stdout.write(self.style.SUCCESS(
+                f'Ratings rebuilt for {updated} titles')
+            )
+            return
+
+        mismatches = list(find_rating_mismatches().values_list(
+            'id', 'rating_sum', 'rating_count', 'actual_sum', 'actual_count'
+        ))
+        for title_id, stored_sum, stored_count, sum_, count in mismatches:
+            self.stdout.write(self.style.WARNING(
+                f'Title {title_id}: stored {stored_sum}/{stored_count}, '
+                f'actual {sum_}/{count}')
+            )
+        if mismatches:
+            raise CommandError(
+                f'{len(mismatches)} titles have outdated ratings'
+            )
+        self.stdout.write(self.style.SUCCESS('All title ratings are valid'))
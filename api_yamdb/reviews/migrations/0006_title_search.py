@@ -0,0 +1,106 @@
+from django.db import migrations
+
+# Схема индекса на момент миграции; код reviews.search может меняться
+# дальше, поэтому DDL и заполнение записаны здесь целиком.
+SEARCH_TABLE = 'reviews_title_search'
+
+
+def get_tables(apps, connection):
+    title = apps.get_model('reviews', 'Title')
+    genre_field = title._meta.get_field('genre')
+    through = genre_field.remote_field.through
+    quote = connection.ops.quote_name
+    return {
+        'title': quote(title._meta.db_table),
+        'genre': quote(apps.get_model('reviews', 'Genre')._meta.db_table),
+        'category': quote(
+            apps.get_model('reviews', 'Category')._meta.db_table
+        ),
+        'through': quote(through._meta.db_table),
+        'title_id': quote(genre_field.m2m_column_name()),
+        'genre_id': quote(genre_field.m2m_reverse_name()),
+    }
+
+
+def create_sqlite_index(cursor, tables):
+    cursor.execute(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} '
+        f'USING fts5(name, year, genres, category, '
+        f'tokenize="unicode61 remove_diacritics 2")'
+    )
+    cursor.execute(
+        f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rank) "
+        f"VALUES ('rank', 'bm25(10.0, 2.0, 4.0, 4.0)')"
+    )
+    cursor.execute(
+        f'INSERT INTO {SEARCH_TABLE} (rowid, name, year, genres, category) '
+        f'SELECT t.id, t.name, CAST(t.year AS TEXT), '
+        f"COALESCE((SELECT group_concat(g.name, ' ') "
+        f'FROM {tables["through"]} tg '
+        f'JOIN {tables["genre"]} g ON g.id = tg.{tables["genre_id"]} '
+        f"WHERE tg.{tables['title_id']} = t.id), ''), "
+        f"COALESCE(c.name, '') "
+        f'FROM {tables["title"]} t '
+        f'LEFT JOIN {tables["category"]} c ON c.id = t.category_id'
+    )
+
+
+def create_postgres_index(cursor, tables):
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ('
+        f'title_id bigint PRIMARY KEY '
+        f'REFERENCES {tables["title"]} (id) ON DELETE CASCADE '
+        f'DEFERRABLE INITIALLY DEFERRED, '
+        f'document tsvector NOT NULL)'
+    )
+    cursor.execute(
+        f'CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document_idx '
+        f'ON {SEARCH_TABLE} USING GIN (document)'
+    )
+    cursor.execute(
+        f'INSERT INTO {SEARCH_TABLE} (title_id, document) '
+        f"SELECT t.id, setweight(to_tsvector('simple', t.name), 'A') || "
+        f"setweight(to_tsvector('simple', t.year::text), 'C') || "
+        f"setweight(to_tsvector('simple', COALESCE(("
+        f"SELECT string_agg(g.name, ' ') FROM {tables['through']} tg "
+        f'JOIN {tables["genre"]} g ON g.id = tg.{tables["genre_id"]} '
+        f"WHERE tg.{tables['title_id']} = t.id), '')), 'B') || "
+        f"setweight(to_tsvector('simple', COALESCE(c.name, '')), 'B') "
+        f'FROM {tables["title"]} t '
+        f'LEFT JOIN {tables["category"]} c ON c.id = t.category_id '
+        f'ON CONFLICT (title_id) DO NOTHING'
+    )
+
+
+INDEX_CREATORS = {
+    'sqlite': create_sqlite_index,
+    'postgresql': create_postgres_index,
+}
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    create_index = INDEX_CREATORS.get(connection.vendor)
+    if create_index is None:
+        # Остальные СУБД ищут без индекса.
+        return
+    with connection.cursor() as cursor:
+        create_index(cursor, get_tables(apps, connection))
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor in INDEX_CREATORS:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_table_counter'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
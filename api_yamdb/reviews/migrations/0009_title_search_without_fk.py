@@ -0,0 +1,41 @@
+from django.db import migrations
+
+SEARCH_TABLE = 'reviews_title_search'
+CONSTRAINT = 'reviews_title_search_title_id_fkey'
+
+
+def drop_title_fk(apps, schema_editor):
+    # flush и TransactionTestCase очищают таблицы Django через TRUNCATE,
+    # а PostgreSQL не даёт очистить таблицу, на которую ссылается
+    # неуправляемая таблица индекса. Строки удалённых произведений
+    # убирает из индекса сигнал post_delete.
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f'ALTER TABLE {SEARCH_TABLE} DROP CONSTRAINT IF EXISTS '
+            f'{CONSTRAINT}'
+        )
+
+
+def add_title_fk(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        # Без ключа flush оставляет в индексе строки удалённых произведений.
+        schema_editor.execute(
+            f'DELETE FROM {SEARCH_TABLE} s WHERE NOT EXISTS '
+            f'(SELECT 1 FROM reviews_title t WHERE t.id = s.title_id)'
+        )
+        schema_editor.execute(
+            f'ALTER TABLE {SEARCH_TABLE} ADD CONSTRAINT {CONSTRAINT} '
+            f'FOREIGN KEY (title_id) REFERENCES reviews_title (id) '
+            f'ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_title_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_title_fk, add_title_fk),
+    ]
@@ -65,11 +65,34 @@ class Title(NameModel):
         on_delete=models.SET_NULL,
         null=True
     )
+    rating_sum = models.PositiveIntegerField(
+        'Сумма оценок', default=0, editable=False
+    )
+    rating_count = models.PositiveIntegerField(
+        'Количество оценок', default=0, editable=False
+    )
+    # Сдвигается при изменении произведения, его отзывов и комментариев,
+    # см. reviews.versions.
+    modified = models.DateTimeField('Изменено', auto_now=True, db_index=True)
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
         ordering = ['id']
+        # Индексы для фильтров TitlesFilter по году и по категории с годом.
+        indexes = [
+            models.Index(fields=['year', 'id'], name='title_year_idx'),
+            models.Index(
+                fields=['category', 'year', 'id'],
+                name='title_category_year_idx'
+            ),
+        ]
+
+    @property
+    def rating(self):
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
 
 
 class Review(TextAuthorPubDate):
@@ -100,6 +123,12 @@ class Review(TextAuthorPubDate):
                 name='unique_review'
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=['title', 'pub_date', 'id'],
+                name='review_title_pub_date_idx'
+            ),
+        ]
         ordering = ['-pub_date']
 
     def __str__(self):
@@ -118,7 +147,23 @@ class Comment(TextAuthorPubDate):
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=['review', 'pub_date', 'id'],
+                name='comment_review_pub_date_idx'
+            ),
+        ]
         ordering = ['-pub_date']
 
     def __str__(self):
         return f'Комментарий к отзыву {self.review} от {self.author}'
+
+
+class TableCounter(models.Model):
+    """Поддерживаемое сигналами количество строк в таблице модели."""
+    model = models.CharField('Модель', max_length=100, primary_key=True)
+    count = models.BigIntegerField('Количество', default=0)
+
+    class Meta:
+        verbose_name = 'счётчик строк'
+        verbose_name_plural = 'Счётчики строк'
@@ -0,0 +1,104 @@
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import Comment, Review, Title
+from .ratings import recalculate_ratings
+from .versions import touch_titles
+
+
+def iter_chunks(queryset, fields, chunk_size):
+    """Отдаёт значения fields пачками по возрастанию pk."""
+    last_pk = 0
+    while True:
+        chunk = list(
+            queryset.filter(pk__gt=last_pk).order_by('pk')
+            .values_list('pk', *fields)[:chunk_size]
+        )
+        if not chunk:
+            return
+        yield chunk
+        if len(chunk) < chunk_size:
+            return
+        last_pk = chunk[-1][0]
+
+
+def delete_rows(model, field, values):
+    """
+    Удаляет строки одним DELETE без сигналов и сборки связанных объектов.
+
+    Всё, что делают сигналы при удалении по одной записи, вызывающий
+    код выполняет один раз после удаления всех пачек. Список values
+    делится на части не длиннее max_query_params: старые сборки SQLite
+    принимают не больше 999 параметров в запросе.
+    """
+    table = connection.ops.quote_name(model._meta.db_table)
+    column = connection.ops.quote_name(model._meta.get_field(field).column)
+    values = list(values)
+    step = connection.features.max_query_params or len(values) or 1
+    deleted = 0
+    with connection.cursor() as cursor:
+        for start in range(0, len(values), step):
+            part = values[start:start + step]
+            placeholders = ', '.join(['%s'] * len(part))
+            cursor.execute(
+                f'DELETE FROM {table} WHERE {column} IN ({placeholders})',
+                part
+            )
+            deleted += cursor.rowcount
+    return deleted
+
+
+def delete_reviews(queryset, chunk_size=None):
+    """
+    Удаляет отзывы и комментарии к ним пачками по chunk_size.
+
+    Рейтинг каждого затронутого произведения пересчитывается один раз в
+    конце, в том числе если удаление прервалось на середине.
+    Возвращает количество удалённых отзывов и id произведений.
+    """
+    chunk_size = chunk_size or settings.MODERATION_CHUNK_SIZE
+    deleted = 0
+    title_ids = set()
+    try:
+        for chunk in iter_chunks(queryset, ('title_id',), chunk_size):
+            review_ids = [pk for pk, _ in chunk]
+            with transaction.atomic():
+                delete_rows(Comment, 'review', review_ids)
+                deleted += delete_rows(Review, 'id', review_ids)
+            title_ids.update(title_id for _, title_id in chunk)
+    finally:
+        if title_ids:
+            recalculate_ratings(Title.objects.filter(pk__in=title_ids))
+    return deleted, title_ids
+
+
+def delete_comments(queryset, chunk_size=None):
+    """Удаляет комментарии пачками; возвращает количество и id произведений."""
+    chunk_size = chunk_size or settings.MODERATION_CHUNK_SIZE
+    deleted = 0
+    title_ids = set()
+    try:
+        for chunk in iter_chunks(queryset, ('review__title_id',), chunk_size):
+            with transaction.atomic():
+                deleted += delete_rows(Comment, 'id', [pk for pk, _ in chunk])
+            title_ids.update(title_id for _, title_id in chunk)
+    finally:
+        touch_titles(title_ids)
+    return deleted, title_ids
+
+
+def update_text(queryset, text, chunk_size=None):
+    """Заменяет текст отзывов или комментариев, например на пометку."""
+    chunk_size = chunk_size or settings.MODERATION_CHUNK_SIZE
+    updated = 0
+    title_field = (
+        'title_id' if queryset.model is Review else 'review__title_id'
+    )
+    title_ids = set()
+    for chunk in iter_chunks(queryset, (title_field,), chunk_size):
+        updated += queryset.model.objects.filter(
+            pk__in=[pk for pk, _ in chunk]
+        ).update(text=text)
+        title_ids.update(title_id for _, title_id in chunk)
+    touch_titles(title_ids)
+    return updated, title_ids
@@ -0,0 +1,64 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Review, Title
+
+
+def change_rating(title_id, score_delta, count_delta):
+    """
+    Сдвигает сохранённый рейтинг произведения одним UPDATE.
+
+    Сумма и количество меняются выражениями F() в БД, поэтому
+    параллельные записи отзывов одного произведения не затирают друг
+    друга и блокировка строки не нужна.
+    """
+    if title_id is None:
+        return
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=F('rating_sum') + score_delta,
+        rating_count=F('rating_count') + count_delta,
+        modified=timezone.now(),
+    )
+
+
+def _review_aggregate(aggregate):
+    return Coalesce(
+        Subquery(
+            Review.objects.filter(title=OuterRef('pk'))
+            .order_by()
+            .values('title')
+            .annotate(value=aggregate)
+            .values('value'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def rating_totals(queryset=None):
+    """Аннотирует произведения фактическими суммой и количеством оценок."""
+    if queryset is None:
+        queryset = Title.objects.all()
+    return queryset.annotate(
+        actual_sum=_review_aggregate(Sum('score')),
+        actual_count=_review_aggregate(Count('id')),
+    )
+
+
+def recalculate_ratings(queryset=None):
+    """Пересчитывает сохранённый рейтинг по таблице отзывов."""
+    if queryset is None:
+        queryset = Title.objects.all()
+    return queryset.order_by().update(
+        rating_sum=_review_aggregate(Sum('score')),
+        rating_count=_review_aggregate(Count('id')),
+        modified=timezone.now(),
+    )
+
+
+def find_rating_mismatches(queryset=None):
+    """Возвращает произведения, у которых сохранённый рейтинг устарел."""
+    return rating_totals(queryset).exclude(
+        rating_sum=F('actual_sum'), rating_count=F('actual_count')
+    )
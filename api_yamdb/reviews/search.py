@@ -0,0 +1,196 @@
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Title
+
+# Таблицу индекса создают миграции reviews.
+SEARCH_TABLE = 'reviews_title_search'
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def get_tokens(query):
+    return TOKEN_PATTERN.findall(query.lower())
+
+
+class SqliteSearchBackend:
+    """Полнотекстовый индекс произведений в виртуальной таблице FTS5."""
+    ordering = ('search_rank', 'id')
+
+    def delete(self, cursor, title_ids):
+        cursor.executemany(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s',
+            [(title_id,) for title_id in title_ids]
+        )
+
+    def upsert(self, cursor, documents):
+        self.delete(cursor, [document[0] for document in documents])
+        cursor.executemany(
+            f'INSERT INTO {SEARCH_TABLE} '
+            f'(rowid, name, year, genres, category) '
+            f'VALUES (%s, %s, %s, %s, %s)',
+            documents
+        )
+
+    def clear(self, cursor):
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+
+    def search(self, queryset, tokens):
+        match = ' '.join(
+            '"{}"*'.format(token.replace('"', '""')) for token in tokens
+        )
+        table = queryset.model._meta.db_table
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s', (match,)
+        )).annotate(search_rank=RawSQL(
+            f'SELECT rank FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s AND rowid = "{table}"."id"',
+            (match,)
+        ))
+
+
+class PostgresSearchBackend:
+    """Индекс произведений в столбце tsvector с GIN-индексом."""
+    ordering = ('-search_rank', 'id')
+    config = 'simple'
+
+    def delete(self, cursor, title_ids):
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE title_id = ANY(%s)',
+            (list(title_ids),)
+        )
+
+    def upsert(self, cursor, documents):
+        cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE} (title_id, document) VALUES (%s, "
+            f"setweight(to_tsvector('{self.config}', %s), 'A') || "
+            f"setweight(to_tsvector('{self.config}', %s), 'C') || "
+            f"setweight(to_tsvector('{self.config}', %s), 'B') || "
+            f"setweight(to_tsvector('{self.config}', %s), 'B')) "
+            f'ON CONFLICT (title_id) '
+            f'DO UPDATE SET document = EXCLUDED.document',
+            documents
+        )
+
+    def clear(self, cursor):
+        cursor.execute(f'TRUNCATE {SEARCH_TABLE}')
+
+    def search(self, queryset, tokens):
+        tsquery = ' & '.join(f'{token}:*' for token in tokens)
+        table = queryset.model._meta.db_table
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT title_id FROM {SEARCH_TABLE} '
+            f"WHERE document @@ to_tsquery('{self.config}', %s)", (tsquery,)
+        )).annotate(search_rank=RawSQL(
+            f"SELECT ts_rank(document, to_tsquery('{self.config}', %s)) "
+            f'FROM {SEARCH_TABLE} WHERE title_id = "{table}"."id"',
+            (tsquery,)
+        ))
+
+
+class LikeSearchBackend:
+    """Поиск без индекса для СУБД без полнотекстового поиска."""
+    ordering = ('id',)
+    search_fields = ('name', 'year', 'genre__name', 'category__name')
+
+    def delete(self, cursor, title_ids):
+        pass
+
+    def upsert(self, cursor, documents):
+        pass
+
+    def clear(self, cursor):
+        pass
+
+    def search(self, queryset, tokens):
+        for token in tokens:
+            condition = Q()
+            for field in self.search_fields:
+                condition |= Q(**{f'{field}__icontains': token})
+            queryset = queryset.filter(condition)
+        return queryset.distinct()
+
+
+BACKENDS = {
+    'sqlite': SqliteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_search_backend(vendor=None):
+    return BACKENDS.get(vendor or connection.vendor, LikeSearchBackend)()
+
+
+def search_titles(queryset, query):
+    """Фильтрует произведения по запросу и сортирует по релевантности."""
+    tokens = get_tokens(query)
+    if not tokens:
+        return queryset
+    backend = get_search_backend()
+    return backend.search(queryset, tokens).order_by(*backend.ordering)
+
+
+def get_documents(title_ids=None, model=Title, using=None,
+                  chunk_size=1000):
+    """Возвращает строки индекса, читая произведения пачками по id."""
+    titles = model.objects.using(using).select_related(
+        'category'
+    ).prefetch_related('genre').order_by('id')
+    if title_ids is not None:
+        titles = titles.filter(pk__in=title_ids)
+    last_id = 0
+    while True:
+        chunk = list(titles.filter(pk__gt=last_id)[:chunk_size])
+        if not chunk:
+            return
+        for title in chunk:
+            yield (
+                title.pk,
+                title.name,
+                str(title.year),
+                ' '.join(genre.name for genre in title.genre.all()),
+                title.category.name if title.category else '',
+            )
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1].pk
+
+
+def index_titles(title_ids):
+    """Обновляет индекс для указанных произведений."""
+    title_ids = set(title_ids)
+    if not title_ids:
+        return
+    backend = get_search_backend()
+    documents = list(get_documents(title_ids))
+    with connection.cursor() as cursor:
+        backend.delete(
+            cursor, title_ids - {document[0] for document in documents}
+        )
+        if documents:
+            backend.upsert(cursor, documents)
+
+
+def remove_titles(title_ids):
+    with connection.cursor() as cursor:
+        get_search_backend().delete(cursor, list(title_ids))
+
+
+def rebuild_index(model=Title, using=None, batch_size=1000):
+    """Полностью перестраивает индекс по таблице произведений."""
+    using = using or DEFAULT_DB_ALIAS
+    db_connection = connections[using]
+    backend = get_search_backend(db_connection.vendor)
+    with db_connection.cursor() as cursor:
+        backend.clear(cursor)
+        batch = []
+        for document in get_documents(model=model, using=using):
+            batch.append(document)
+            if len(batch) >= batch_size:
+                backend.upsert(cursor, batch)
+                batch = []
+        if batch:
+            backend.upsert(cursor, batch)
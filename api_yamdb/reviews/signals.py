@@ -0,0 +1,172 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+
+from users.models import CustomUser
+from .cascade import is_deleting, mark_deleting, unmark_deleting
+from .counters import COUNT_DEPENDENCIES, change_table_count, invalidate_counts
+from .models import Category, Comment, Genre, Review, Title
+from .ratings import change_rating
+from .search import index_titles, remove_titles
+from .slugs import category_slugs, genre_slugs
+from .versions import get_author_title_ids, touch_review_title, touch_titles
+
+
+@receiver(pre_save, sender=Review)
+def remember_review_rating(sender, instance, raw=False, **kwargs):
+    # Прежние произведение и оценка читаются из БД одним запросом:
+    # значения в памяти могли устареть.
+    instance._old_rating = None
+    if not raw and instance.pk is not None:
+        instance._old_rating = Review.objects.filter(
+            pk=instance.pk
+        ).values_list('title_id', 'score').first()
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    old = getattr(instance, '_old_rating', None)
+    if old is None:
+        change_rating(instance.title_id, instance.score, 1)
+    elif old[0] == instance.title_id:
+        change_rating(instance.title_id, instance.score - old[1], 0)
+    else:
+        change_rating(old[0], -old[1], -1)
+        change_rating(instance.title_id, instance.score, 1)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    # Рейтинг произведения, которое удаляется вместе с отзывами, не
+    # пересчитывается.
+    if not is_deleting(Title, instance.title_id):
+        change_rating(instance.title_id, -instance.score, -1)
+
+
+@receiver(pre_delete, sender=Title)
+@receiver(pre_delete, sender=Review)
+def mark_parent_deleting(sender, instance, **kwargs):
+    mark_deleting(instance)
+
+
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Review)
+def unmark_parent_deleting(sender, instance, **kwargs):
+    unmark_deleting(instance)
+
+
+def update_counts_on_save(sender, instance, created, raw=False, **kwargs):
+    if created:
+        change_table_count(sender, 1)
+    invalidate_counts(sender)
+
+
+def update_counts_on_delete(sender, instance, **kwargs):
+    change_table_count(sender, -1)
+    invalidate_counts(sender)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_counts_on_genres_change(sender, **kwargs):
+    invalidate_counts(sender)
+
+
+for counted_model in COUNT_DEPENDENCIES:
+    post_save.connect(update_counts_on_save, sender=counted_model)
+    post_delete.connect(update_counts_on_delete, sender=counted_model)
+
+
+@receiver(post_save, sender=Title)
+def index_title_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_titles([instance.pk])
+
+
+@receiver(post_delete, sender=Title)
+def remove_title_from_index(sender, instance, **kwargs):
+    remove_titles([instance.pk])
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def touch_title_on_comment_change(sender, instance, raw=False, **kwargs):
+    # Штамп произведения, у которого удаляется отзыв, один раз обновляет
+    # сдвиг рейтинга, а не каждый удаляемый вместе с отзывом комментарий.
+    if not raw and not is_deleting(Review, instance.review_id):
+        touch_review_title(instance.review_id)
+
+
+@receiver(post_save, sender=CustomUser)
+def touch_titles_on_username_change(sender, instance, **kwargs):
+    # Имя автора входит в ответы с отзывами и комментариями, а их версия
+    # — штамп изменения произведения.
+    if getattr(instance, 'username_changed', False):
+        touch_titles(get_author_title_ids(instance.pk))
+
+
+def update_titles(title_ids):
+    """Обновляет поисковый индекс и штамп изменения произведений."""
+    index_titles(title_ids)
+    touch_titles(title_ids)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def update_titles_on_genres_change(sender, instance, action, reverse,
+                                   pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear',
+                      'pre_clear'):
+        return
+    if not reverse:
+        if action != 'pre_clear':
+            update_titles([instance.pk])
+    elif action == 'pre_clear':
+        # После очистки связей уже не узнать, какие произведения
+        # были у жанра.
+        instance._changed_title_ids = list(
+            instance.title_set.values_list('pk', flat=True)
+        )
+    elif action == 'post_clear':
+        update_titles(getattr(instance, '_changed_title_ids', []))
+    else:
+        update_titles(pk_set or [])
+
+
+def get_related_title_ids(instance):
+    if isinstance(instance, Genre):
+        titles = Title.objects.filter(genre=instance)
+    else:
+        titles = Title.objects.filter(category=instance)
+    return list(titles.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Category)
+def update_titles_on_rename(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        update_titles(get_related_title_ids(instance))
+
+
+@receiver(pre_delete, sender=Genre)
+@receiver(pre_delete, sender=Category)
+def collect_titles_before_delete(sender, instance, **kwargs):
+    instance._changed_title_ids = get_related_title_ids(instance)
+
+
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Category)
+def update_titles_after_delete(sender, instance, **kwargs):
+    update_titles(getattr(instance, '_changed_title_ids', []))
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def invalidate_genre_slugs(sender, **kwargs):
+    genre_slugs.invalidate()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_slugs(sender, **kwargs):
+    category_slugs.invalidate()
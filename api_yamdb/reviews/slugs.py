@@ -0,0 +1,70 @@
+import threading
+import time
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Category, Genre
+
+
+class SlugCache:
+    """
+    Словарь slug → объект в памяти процесса.
+
+    Категорий и жанров немного, и меняются они редко, поэтому таблица
+    читается целиком. Словарь перечитывается, когда меняется версия в
+    общем кэше (её сдвигает invalidate()) или истекает
+    SLUG_CACHE_TIMEOUT: с локальным кэшем другие процессы не видят
+    новую версию. Неизвестный slug дочитывается из БД, так что только
+    что созданный объект находится сразу.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.version_key = f'slug_cache_{model._meta.label_lower}'
+        self.lock = threading.Lock()
+        self.version = None
+        self.loaded_at = 0
+        self.by_slug = {}
+
+    def __deepcopy__(self, memo):
+        # Поля сериализаторов и фильтров копируются на каждый запрос, а
+        # словарь должен оставаться общим.
+        return self
+
+    def get_version(self):
+        return cache.get_or_set(self.version_key, uuid4().hex, timeout=None)
+
+    def invalidate(self):
+        cache.set(self.version_key, uuid4().hex, timeout=None)
+
+    def load(self):
+        version = self.get_version()
+        expired = (
+            time.monotonic() - self.loaded_at > settings.SLUG_CACHE_TIMEOUT
+        )
+        if version == self.version and not expired:
+            return
+        with self.lock:
+            objects = list(self.model.objects.all())
+            self.by_slug = {obj.slug: obj for obj in objects}
+            self.version = version
+            self.loaded_at = time.monotonic()
+
+    def get(self, slug):
+        self.load()
+        obj = self.by_slug.get(slug)
+        if obj is None:
+            obj = self.model.objects.filter(slug=slug).first()
+            if obj is not None:
+                self.by_slug[slug] = obj
+        return obj
+
+    def choices(self):
+        self.load()
+        return [(slug, slug) for slug in self.by_slug]
+
+
+category_slugs = SlugCache(Category)
+genre_slugs = SlugCache(Genre)
@@ -0,0 +1,56 @@
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .counters import get_table_count
+from .models import Comment, Review, Title
+
+
+def touch_titles(title_ids=None):
+    """Отмечает произведения изменёнными; без title_ids — все."""
+    titles = Title.objects.all()
+    if title_ids is not None:
+        title_ids = list(title_ids)
+        if not title_ids:
+            return
+        titles = titles.filter(pk__in=title_ids)
+    titles.update(modified=timezone.now())
+
+
+def touch_review_title(review_id):
+    Title.objects.filter(reviews__id=review_id).update(
+        modified=timezone.now()
+    )
+
+
+def get_author_title_ids(user_id):
+    """Id произведений, где у пользователя есть отзывы или комментарии."""
+    return list(Title.objects.filter(
+        Q(pk__in=Review.objects.filter(author_id=user_id).values('title_id'))
+        | Q(pk__in=Comment.objects.filter(author_id=user_id).values(
+            'review__title_id'
+        ))
+    ).values_list('pk', flat=True))
+
+
+def get_title_version(title_id):
+    """
+    Возвращает (время изменения, количество отзывов) произведения.
+
+    Штамп меняется при любом изменении произведения, его отзывов и
+    комментариев к ним, поэтому им проверяются все эти ресурсы.
+    """
+    try:
+        title_id = int(title_id)
+    except (TypeError, ValueError):
+        return None
+    return Title.objects.filter(pk=title_id).values_list(
+        'modified', 'rating_count'
+    ).first()
+
+
+def get_titles_version():
+    """Возвращает (последнее изменение, количество) для списка произведений."""
+    modified = Title.objects.aggregate(modified=Max('modified'))['modified']
+    if modified is None:
+        return None
+    return modified, get_table_count(Title)
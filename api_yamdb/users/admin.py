@@ -7,4 +7,20 @@ UserAdmin.fieldsets += (
     ('Extra Fields', {'fields': ('bio', 'role')}),
 )
 
-admin.site.register(CustomUser, UserAdmin)
+
+class CustomUserAdmin(UserAdmin):
+    search_fields = ('username', 'email')
+
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск идёт только по индексам: слово с @ ищется по началу email,
+        # остальные — по началу username_lower. icontains по имени и
+        # фамилии читал бы всю таблицу, поэтому они в поиске не участвуют.
+        for term in search_term.split():
+            if '@' in term:
+                queryset = queryset.email_startswith(term)
+            else:
+                queryset = queryset.username_startswith(term)
+        return queryset, False
+
+
+admin.site.register(CustomUser, CustomUserAdmin)
@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+
+User = get_user_model()
+
+ROLE_CLAIM = 'role'
+IS_SUPERUSER_CLAIM = 'is_superuser'
+
+
+def get_user_cache():
+    return caches[settings.AUTH_USER_CACHE]
+
+
+def get_user_cache_key(user_id):
+    return f'auth_user_{user_id}'
+
+
+def invalidate_cached_user(user_id):
+    get_user_cache().delete(get_user_cache_key(user_id))
+
+
+def add_user_claims(token, user):
+    token[ROLE_CLAIM] = user.role
+    token[IS_SUPERUSER_CLAIM] = user.is_superuser
+    return token
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT-аутентификация, которая берёт пользователя из короткоживущего
+    кэша процесса вместо запроса к таблице пользователей.
+
+    Роль и is_superuser из токена проверяются по кэшированной записи:
+    если они расходятся, запись перечитывается из БД.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+
+        cache = get_user_cache()
+        key = get_user_cache_key(user_id)
+        values = cache.get(key)
+        if values is None or not self.claims_match(validated_token, values):
+            user = super().get_user(validated_token)
+            values = {
+                field.attname: getattr(user, field.attname)
+                for field in User._meta.concrete_fields
+            }
+            cache.set(key, values, timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+            return user
+
+        if not values['is_active']:
+            raise AuthenticationFailed(
+                _('User is inactive'), code='user_inactive'
+            )
+        user = User.from_db(
+            User.objects.db, list(values), list(values.values())
+        )
+        user.from_auth_cache = True
+        return user
+
+    @staticmethod
+    def claims_match(validated_token, values):
+        return all(
+            validated_token.get(claim, values[claim]) == values[claim]
+            for claim in (ROLE_CLAIM, IS_SUPERUSER_CLAIM)
+        )
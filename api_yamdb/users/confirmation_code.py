@@ -1,19 +1,106 @@
+import threading
+import time
 import uuid
+from collections import OrderedDict
+from datetime import timedelta
 
-from django.core.cache import cache
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
 
-from api_yamdb.settings import TIMEOUT_CONFIRMATION_CODE
+
+class MemoryCodeStore:
+    """
+    Коды подтверждения в памяти процесса: LRU с ограничением по времени.
+
+    Подходит для одного процесса; при нескольких воркерах или узлах
+    используйте DatabaseCodeStore.
+    """
+
+    def __init__(self, max_size=None):
+        self.max_size = (
+            max_size or settings.CONFIRMATION_CODE_STORE_MAX_SIZE
+        )
+        self.codes = OrderedDict()
+        self.lock = threading.Lock()
+
+    def set(self, username, code, timeout):
+        with self.lock:
+            self.codes[username] = (code, time.monotonic() + timeout)
+            self.codes.move_to_end(username)
+            while len(self.codes) > self.max_size:
+                self.codes.popitem(last=False)
+
+    def get(self, username):
+        with self.lock:
+            code, expires_at = self.codes.get(username, (None, 0))
+            if code is None:
+                return None
+            if expires_at <= time.monotonic():
+                del self.codes[username]
+                return None
+            self.codes.move_to_end(username)
+            return code
+
+
+class DatabaseCodeStore:
+    """
+    Коды подтверждения в таблице БД, общей для всех узлов.
+
+    Просроченные записи удаляются по индексу expires_at не чаще,
+    чем раз в CONFIRMATION_CODE_PURGE_INTERVAL секунд.
+    """
+
+    def __init__(self):
+        self.purged_at = 0
+
+    @property
+    def model(self):
+        from .models import ConfirmationCode
+        return ConfirmationCode
+
+    def set(self, username, code, timeout):
+        now = timezone.now()
+        self.model.objects.update_or_create(
+            username=username,
+            defaults={
+                'code': code,
+                'expires_at': now + timedelta(seconds=timeout),
+            }
+        )
+        self.purge_expired(now)
+
+    def get(self, username):
+        return self.model.objects.filter(
+            username=username, expires_at__gt=timezone.now()
+        ).values_list('code', flat=True).first()
+
+    def purge_expired(self, now):
+        if time.monotonic() - self.purged_at < (
+                settings.CONFIRMATION_CODE_PURGE_INTERVAL):
+            return
+        self.purged_at = time.monotonic()
+        self.model.objects.filter(expires_at__lte=now).delete()
+
+
+_store = None
+
+
+def get_code_store():
+    global _store
+    if _store is None:
+        _store = import_string(settings.CONFIRMATION_CODE_STORE)()
+    return _store
 
 
 def store_confirmation_code(username, code):
-    cache.set(
-        f'confirmation_code_{username}',
-        code, timeout=TIMEOUT_CONFIRMATION_CODE
+    get_code_store().set(
+        username, code, timeout=settings.TIMEOUT_CONFIRMATION_CODE
     )
 
 
 def get_confirmation_code(username):
-    return cache.get(f'confirmation_code_{username}')
+    return get_code_store().get(username)
 
 
 def generate_confirmation_code():
@@ -0,0 +1,111 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection, send_mail
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+
+def send_email(subject, message, recipient):
+    """Отправляет письмо сразу или ставит его в очередь отправки."""
+    if not settings.EMAIL_OUTBOX_ENABLED:
+        send_mail(
+            subject=subject,
+            message=message,
+            from_email=settings.ADMIN_EMAIL,
+            recipient_list=[recipient],
+            fail_silently=True,
+        )
+        return
+    OutgoingEmail.objects.create(
+        subject=subject,
+        message=message,
+        from_email=settings.ADMIN_EMAIL,
+        recipient=recipient,
+        send_after=timezone.now(),
+    )
+
+
+def get_retry_delay(attempts):
+    return timedelta(
+        seconds=settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    )
+
+
+def mark_failed(email, error):
+    email.last_error = str(error)
+    email.send_after = timezone.now() + get_retry_delay(email.attempts)
+
+
+def claim_emails(batch_size):
+    """
+    Отбирает пачку писем к отправке и засчитывает им попытку.
+
+    send_after сдвигается на задержку следующей попытки, поэтому пока
+    идёт отправка, другие обработчики эти письма не возьмут, а если
+    обработчик упадёт, письма снова станут доступны после задержки.
+    Строки заблокированы только на время этой короткой транзакции.
+    """
+    with transaction.atomic():
+        emails = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(
+                sent_at__isnull=True,
+                send_after__lte=timezone.now(),
+                attempts__lt=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+            )[:batch_size]
+        )
+        now = timezone.now()
+        for email in emails:
+            email.attempts += 1
+            email.send_after = now + get_retry_delay(email.attempts)
+        OutgoingEmail.objects.bulk_update(emails, ['attempts', 'send_after'])
+    return emails
+
+
+def send_claimed_emails(emails):
+    """Отправляет письма через одно SMTP-соединение, вне транзакции."""
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        for email in emails:
+            mark_failed(email, error)
+        return
+    try:
+        for email in emails:
+            try:
+                EmailMessage(
+                    subject=email.subject,
+                    body=email.message,
+                    from_email=email.from_email,
+                    to=[email.recipient],
+                    connection=connection,
+                ).send()
+            except Exception as error:
+                mark_failed(email, error)
+            else:
+                email.sent_at = timezone.now()
+    finally:
+        connection.close()
+
+
+def send_queued_emails(batch_size=None):
+    """
+    Отправляет пачку писем из очереди.
+
+    Неотправленные письма откладываются с экспоненциально растущей
+    задержкой, пока не исчерпано EMAIL_OUTBOX_MAX_ATTEMPTS попыток.
+    Возвращает количество отправленных и неудачных писем.
+    """
+    emails = claim_emails(batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE)
+    if not emails:
+        return 0, 0
+    send_claimed_emails(emails)
+    OutgoingEmail.objects.bulk_update(
+        emails, ['last_error', 'send_after', 'sent_at']
+    )
+    sent = sum(email.sent_at is not None for email in emails)
+    return sent, len(emails) - sent
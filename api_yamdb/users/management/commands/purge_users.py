@@ -0,0 +1,49 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.cache import invalidate_titles
+from users.purge import purge_deleted_users
+
+
+class Command(BaseCommand):
+    help = 'Delete disabled users together with their reviews and comments'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.USER_PURGE_BATCH_SIZE,
+            help='Number of users deleted in one pass'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.MODERATION_CHUNK_SIZE,
+            help='Number of rows removed by one DELETE'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=settings.USER_PURGE_POLL_INTERVAL,
+            help='Seconds to wait when there is nobody to delete'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Delete everybody who is waiting and exit'
+        )
+
+    def handle(self, *args, **kwargs):
+        while True:
+            purged, title_ids = purge_deleted_users(
+                kwargs['batch_size'], kwargs['chunk_size']
+            )
+            invalidate_titles(title_ids)
+            if purged:
+                self.stdout.write(f'Deleted {purged} users')
+            if purged < kwargs['batch_size']:
+                if kwargs['once']:
+                    return
+                time.sleep(kwargs['interval'])
@@ -0,0 +1,39 @@
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+import users.models
+
+
+def fill_username_lower(apps, schema_editor):
+    CustomUser = apps.get_model('users', 'CustomUser')
+    CustomUser.objects.using(schema_editor.connection.alias).update(
+        username_lower=Lower('username')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_outgoing_email'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='customuser',
+            managers=[
+                ('objects', users.models.CustomUserManager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='username_lower',
+            field=models.CharField(default='', editable=False, max_length=150, verbose_name='username в нижнем регистре'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_username_lower, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='customuser',
+            name='username_lower',
+            field=models.CharField(db_index=True, editable=False, max_length=150, verbose_name='username в нижнем регистре'),
+        ),
+    ]
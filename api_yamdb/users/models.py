@@ -1,11 +1,45 @@
-from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.contrib.auth.models import AbstractUser, UserManager
+from django.db import connections, models
 from django.core.validators import RegexValidator, MinLengthValidator
 
 from api_yamdb.settings import VALID_USERNAME_CHARACTERS
 from .validators import validate_role, validate_username
 
 
+class UserQuerySet(models.QuerySet):
+
+    def username_startswith(self, prefix):
+        """
+        Регистронезависимый поиск по началу username через индекс.
+
+        На PostgreSQL Django создаёт для индексированного CharField ещё и
+        индекс varchar_pattern_ops, которым обслуживается LIKE 'abc%'. В
+        SQLite LIKE регистронезависим и индекс не использует, поэтому
+        префикс ищется диапазоном значений.
+        """
+        return self._startswith('username_lower', prefix.lower())
+
+    def email_startswith(self, prefix):
+        """Поиск по началу email через уникальный индекс, с учётом регистра."""
+        return self._startswith('email', prefix)
+
+    def _startswith(self, field, prefix):
+        if connections[self.db].vendor == 'postgresql':
+            return self.filter(**{f'{field}__startswith': prefix})
+        return self.filter(**{
+            f'{field}__gte': prefix,
+            f'{field}__lt': prefix + '\U0010ffff',
+        })
+
+    def not_deleted(self):
+        """Пользователи, не ожидающие удаления, см. users.purge."""
+        return self.filter(deleted_at__isnull=True)
+
+
+class CustomUserManager(UserManager.from_queryset(UserQuerySet)):
+    pass
+
+
 class CustomUser(AbstractUser):
     username = models.CharField(
         'username', max_length=150, unique=True,
@@ -21,7 +55,62 @@ class CustomUser(AbstractUser):
         max_length=50, blank=True, validators=[validate_role],
         default='user'
     )
+    username_lower = models.CharField(
+        'username в нижнем регистре', max_length=150, db_index=True,
+        editable=False
+    )
+    deleted_at = models.DateTimeField(
+        'Удалён', null=True, blank=True, db_index=True, editable=False
+    )
+
+    objects = CustomUserManager()
 
     class Meta:
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
+
+    def save(self, *args, **kwargs):
+        if getattr(self, 'from_auth_cache', False):
+            # Запись из кэша аутентификации могла устареть, и её
+            # сохранение вернуло бы в БД старые роль и пароль.
+            raise ValueError(
+                'Пользователя из кэша аутентификации нельзя сохранять, '
+                'прочитайте его из БД.'
+            )
+        self.username_lower = self.username.lower()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'username' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'username_lower'}
+        super().save(*args, **kwargs)
+
+
+class ConfirmationCode(models.Model):
+    username = models.CharField('username', max_length=150, unique=True)
+    code = models.CharField('Код подтверждения', max_length=36)
+    expires_at = models.DateTimeField('Действителен до', db_index=True)
+
+    class Meta:
+        verbose_name = 'Код подтверждения'
+        verbose_name_plural = 'Коды подтверждения'
+
+
+class OutgoingEmail(models.Model):
+    subject = models.CharField('Тема', max_length=255)
+    message = models.TextField('Текст')
+    from_email = models.EmailField('Отправитель')
+    recipient = models.EmailField('Получатель')
+    created_at = models.DateTimeField('Создано', auto_now_add=True)
+    send_after = models.DateTimeField('Отправить после')
+    sent_at = models.DateTimeField('Отправлено', null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        ordering = ['send_after']
+        indexes = [
+            models.Index(
+                fields=['sent_at', 'send_after'], name='outbox_pending_idx'
+            ),
+        ]
@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from reviews.models import Comment, Review
+from reviews.moderation import delete_comments, delete_reviews
+
+
+User = get_user_model()
+
+
+def soft_delete_user(user):
+    """
+    Отключает пользователя; его отзывы и комментарии удалит purge_user.
+
+    Каскадное удаление через Django загружает в память все отзывы и
+    комментарии пользователя и комментарии к его отзывам, поэтому у
+    активного автора оно не укладывается во время запроса.
+    """
+    user.is_active = False
+    user.deleted_at = timezone.now()
+    user.save(update_fields=['is_active', 'deleted_at'])
+
+
+def has_little_content(user, limit=None):
+    """Проверяет, что у пользователя не больше limit отзывов и комментариев."""
+    if limit is None:
+        limit = settings.USER_PURGE_INLINE_LIMIT
+    # Срез ограничивает COUNT, так что у спамера не считаются все записи.
+    reviews = Review.objects.filter(author_id=user.pk)[:limit + 1].count()
+    if reviews > limit:
+        return False
+    comments = Comment.objects.filter(
+        author_id=user.pk
+    )[:limit + 1 - reviews].count()
+    return reviews + comments <= limit
+
+
+def purge_user(user, chunk_size=None):
+    """
+    Удаляет пользователя вместе с его отзывами и комментариями.
+
+    Записи удаляются пачками, рейтинги затронутых произведений
+    пересчитываются после удаления, а сам пользователь удаляется, когда
+    каскаду Django уже нечего собирать.
+    Возвращает id затронутых произведений.
+    """
+    _, title_ids = delete_comments(
+        Comment.objects.filter(author_id=user.pk), chunk_size
+    )
+    _, review_title_ids = delete_reviews(
+        Review.objects.filter(author_id=user.pk), chunk_size
+    )
+    User.objects.filter(pk=user.pk).delete()
+    return title_ids | review_title_ids
+
+
+def purge_deleted_users(batch_size=None, chunk_size=None):
+    """
+    Удаляет пачку отключённых пользователей.
+
+    Возвращает количество удалённых пользователей и id затронутых
+    произведений.
+    """
+    batch_size = batch_size or settings.USER_PURGE_BATCH_SIZE
+    users = list(
+        User.objects.filter(deleted_at__isnull=False)
+        .order_by('deleted_at')[:batch_size]
+    )
+    title_ids = set()
+    for user in users:
+        title_ids |= purge_user(user, chunk_size)
+    return len(users), title_ids
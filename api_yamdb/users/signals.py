@@ -0,0 +1,33 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_cached_user
+
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(pre_save, sender=User)
+def detect_username_change(sender, instance, raw=False, update_fields=None,
+                           **kwargs):
+    # Имя автора выводится в отзывах и комментариях, и по этому флагу
+    # сбрасываются их ETag и кэш ответов.
+    instance.username_changed = False
+    if (
+        raw or instance.pk is None
+        or (update_fields is not None and 'username' not in update_fields)
+    ):
+        return
+    old_username = User.objects.filter(pk=instance.pk).values_list(
+        'username', flat=True
+    ).first()
+    instance.username_changed = (
+        old_username is not None and old_username != instance.username
+    )
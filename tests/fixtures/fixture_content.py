@@ -0,0 +1,17 @@
+import pytest
+
+from tests.utils import create_comments
+
+
+@pytest.fixture
+def content(admin, admin_client, user, user_client, moderator,
+            moderator_client):
+    """
+    Произведения с отзывами пользователя, модератора и администратора на
+    первое из них и их комментариями к первому отзыву.
+    """
+    return create_comments(admin_client, {
+        admin: admin_client,
+        user: user_client,
+        moderator: moderator_client,
+    })
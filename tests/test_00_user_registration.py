@@ -375,3 +375,151 @@ class Test00UserRegistration:
             'пользователя, созданного администратором,  возвращает ответ '
             'со статусом 200.'
         )
+
+    def test_outbox_queues_signup_email(self, client, settings):
+        from django.core.management import call_command
+
+        from users.models import OutgoingEmail
+
+        settings.EMAIL_OUTBOX_ENABLED = True
+        outbox_before_count = len(mail.outbox)
+        valid_data = {
+            'email': 'queued@yamdb.fake',
+            'username': 'queued_user'
+        }
+        response = client.post(self.URL_SIGNUP, data=valid_data)
+        assert response.status_code == HTTPStatus.OK
+        assert len(mail.outbox) == outbox_before_count, (
+            'Проверьте, что с `EMAIL_OUTBOX_ENABLED` письмо не '
+            'отправляется в запросе.'
+        )
+        email = OutgoingEmail.objects.get()
+        assert email.recipient == valid_data['email'], (
+            'Проверьте, что с `EMAIL_OUTBOX_ENABLED` письмо ставится в '
+            'очередь.'
+        )
+
+        call_command('send_emails', '--once')
+        assert len(mail.outbox) == outbox_before_count + 1, (
+            'Проверьте, что команда `send_emails --once` отправляет письма '
+            'из очереди.'
+        )
+        assert valid_data['email'] in mail.outbox[-1].to
+        email.refresh_from_db()
+        assert email.sent_at is not None and email.attempts == 1
+
+    def test_outbox_retries_failed_emails(self, settings, monkeypatch):
+        from django.core.mail import EmailMessage
+        from django.db import connection
+        from django.utils import timezone
+
+        from users.emails import send_email, send_queued_emails
+        from users.models import OutgoingEmail
+
+        settings.EMAIL_OUTBOX_ENABLED = True
+        settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 2
+        settings.EMAIL_OUTBOX_RETRY_DELAY = 60
+        for recipient in ('first@yamdb.fake', 'bad@yamdb.fake',
+                          'second@yamdb.fake'):
+            send_email('Тема', 'Текст', recipient)
+        original_send = EmailMessage.send
+
+        def send(message, *args, **kwargs):
+            assert not connection.in_atomic_block, (
+                'Проверьте, что письма отправляются вне транзакции, '
+                'блокирующей строки очереди.'
+            )
+            if 'bad@yamdb.fake' in message.to:
+                raise OSError('Отказ SMTP-сервера')
+            return original_send(message, *args, **kwargs)
+
+        monkeypatch.setattr(EmailMessage, 'send', send)
+        assert send_queued_emails(batch_size=2) == (1, 1), (
+            'Проверьте, что за раз отправляется не больше batch_size писем.'
+        )
+        assert send_queued_emails(batch_size=2) == (1, 0), (
+            'Проверьте, что неудачное письмо откладывается до следующей '
+            'попытки.'
+        )
+        assert len(mail.outbox) == 2
+
+        failed = OutgoingEmail.objects.get(recipient='bad@yamdb.fake')
+        assert failed.sent_at is None and failed.attempts == 1
+        assert 'Отказ SMTP-сервера' in failed.last_error
+        delay = (failed.send_after - timezone.now()).total_seconds()
+        assert 50 < delay <= 60, (
+            'Проверьте, что первая повторная попытка откладывается на '
+            '`EMAIL_OUTBOX_RETRY_DELAY` секунд.'
+        )
+
+        OutgoingEmail.objects.update(send_after=timezone.now())
+        assert send_queued_emails() == (0, 1)
+        failed.refresh_from_db()
+        delay = (failed.send_after - timezone.now()).total_seconds()
+        assert 110 < delay <= 120, (
+            'Проверьте, что задержка растёт с каждой попыткой.'
+        )
+
+        OutgoingEmail.objects.update(send_after=timezone.now())
+        assert send_queued_emails() == (0, 0), (
+            'Проверьте, что после `EMAIL_OUTBOX_MAX_ATTEMPTS` попыток письмо '
+            'больше не отправляется.'
+        )
+
+    def test_memory_code_store(self, monkeypatch):
+        from users import confirmation_code
+        from users.confirmation_code import MemoryCodeStore
+
+        clock = [1000.0]
+        monkeypatch.setattr(
+            confirmation_code.time, 'monotonic', lambda: clock[0]
+        )
+        store = MemoryCodeStore(max_size=2)
+        store.set('first', 'code-1', timeout=60)
+        store.set('second', 'code-2', timeout=60)
+        assert store.get('first') == 'code-1'
+        store.set('third', 'code-3', timeout=60)
+        assert store.get('second') is None, (
+            'Проверьте, что при переполнении MemoryCodeStore вытесняется '
+            'код, к которому дольше всего не обращались.'
+        )
+        assert store.get('first') == 'code-1'
+        assert store.get('third') == 'code-3'
+
+        clock[0] += 60
+        assert store.get('first') is None, (
+            'Проверьте, что MemoryCodeStore не возвращает просроченный код.'
+        )
+        assert 'first' not in store.codes
+
+    def test_database_code_store(self, settings):
+        import time
+
+        from users.confirmation_code import DatabaseCodeStore
+        from users.models import ConfirmationCode
+
+        settings.CONFIRMATION_CODE_PURGE_INTERVAL = 300
+        store = DatabaseCodeStore()
+        store.purged_at = time.monotonic()
+        store.set('expired', 'code-1', timeout=-1)
+        store.set('valid', 'code-2', timeout=60)
+        assert store.get('expired') is None, (
+            'Проверьте, что DatabaseCodeStore не возвращает просроченный код.'
+        )
+        assert store.get('valid') == 'code-2'
+        store.set('valid', 'code-3', timeout=60)
+        assert store.get('valid') == 'code-3', (
+            'Проверьте, что новый код заменяет прежний.'
+        )
+        assert ConfirmationCode.objects.count() == 2, (
+            'Проверьте, что просроченные коды удаляются не чаще, чем раз в '
+            '`CONFIRMATION_CODE_PURGE_INTERVAL` секунд.'
+        )
+
+        store.purged_at -= settings.CONFIRMATION_CODE_PURGE_INTERVAL
+        store.set('another', 'code-4', timeout=60)
+        assert set(
+            ConfirmationCode.objects.values_list('username', flat=True)
+        ) == {'valid', 'another'}, (
+            'Проверьте, что DatabaseCodeStore удаляет просроченные коды.'
+        )
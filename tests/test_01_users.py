@@ -134,6 +134,41 @@ class Test01UserAPI:
             f'корректными данными: {", ".join(admin_as_dict.keys())}.'
         )
 
+    def test_04_03_users_search_by_prefix(self, admin_client, admin,
+                                          moderator, user):
+        from django.contrib import admin as admin_site
+
+        from users.admin import CustomUserAdmin
+
+        def search(term):
+            response = admin_client.get(self.USERS_URL, {'search': term})
+            assert response.status_code == HTTPStatus.OK
+            return {item['username'] for item in response.json()['results']}
+
+        assert search('testmod') == {moderator.username}, (
+            f'Проверьте, что `{self.USERS_URL}?search=` ищет по началу '
+            '`username` без учёта регистра.'
+        )
+        assert search('TESTADM') == {admin.username}
+        assert search('test') == {
+            admin.username, moderator.username, user.username
+        }
+        assert search('admin') == set(), (
+            f'Проверьте, что `{self.USERS_URL}?search=` ищет только по '
+            'началу `username`.'
+        )
+
+        model_admin = CustomUserAdmin(type(user), admin_site.site)
+        for term, expected in (('TestMod', moderator), ('testmoder@', moderator),
+                               ('testuser@yamdb', user)):
+            queryset, _ = model_admin.get_search_results(
+                None, type(user).objects.all(), term
+            )
+            assert list(queryset) == [expected], (
+                'Проверьте, что админка ищет пользователей по началу '
+                '`username` и `email`.'
+            )
+
     def test_04_01_users_get_admin_only(self, user_client, moderator_client):
         for client in (user_client, moderator_client):
             response = client.get(self.USERS_URL)
@@ -472,6 +507,36 @@ class Test01UserAPI:
             '{username}/` удаляет пользователя.'
         )
 
+    def test_08_05_users_username_delete_author_with_content(
+            self, content, admin_client, user, user_client,
+            django_user_model, settings):
+        from django.core.management import call_command
+
+        from reviews.models import Comment, Review, Title
+
+        _, reviews, titles = content
+        settings.USER_PURGE_INLINE_LIMIT = 0
+        response = admin_client.delete(f'{self.USERS_URL}{user.username}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        user.refresh_from_db()
+        assert user.deleted_at is not None and not user.is_active, (
+            'Проверьте, что автор с отзывами при удалении только '
+            'отключается.'
+        )
+        response = admin_client.get(f'{self.USERS_URL}{user.username}/')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        response = user_client.get(self.USERS_ME_URL)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+        call_command('purge_users', once=True, chunk_size=1)
+        assert not django_user_model.objects.filter(pk=user.pk).exists()
+        assert not Review.objects.filter(author=user).exists()
+        assert not Comment.objects.filter(author=user).exists()
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_count, title.rating_sum) == (
+            len(reviews) - 1, 5 * (len(reviews) - 1)
+        ), 'Проверьте, что рейтинг пересчитан после удаления автора.'
+
     def test_09_users_me_get(self, user_client, user):
         response = user_client.get(f'{self.USERS_ME_URL}')
         assert response.status_code == HTTPStatus.OK, (
@@ -564,3 +629,26 @@ class Test01UserAPI:
             f'Проверьте, что PATCH-запрос к `{self.USERS_ME_URL}` с ключом '
             '`role` не изменяет роль пользователя.'
         )
+
+    def test_10_04_users_me_patch_keeps_changes_made_elsewhere(
+            self, admin_client, user_client, user, django_user_model):
+        from users.authentication import get_user_cache, get_user_cache_key
+
+        user_client.get(self.USERS_ME_URL)
+        key = get_user_cache_key(user.pk)
+        stale = get_user_cache().get(key)
+        assert stale is not None
+        response = admin_client.patch(
+            f'{self.USERS_URL}{user.username}/', data={'role': 'moderator'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        # Другой процесс не видит сброса кэша и держит старую запись.
+        get_user_cache().set(key, stale)
+
+        response = user_client.patch(self.USERS_ME_URL, data={'bio': 'new'})
+        assert response.status_code == HTTPStatus.OK
+        user = django_user_model.objects.get(pk=user.pk)
+        assert (user.bio, user.role) == ('new', 'moderator'), (
+            f'Проверьте, что PATCH-запрос к `{self.USERS_ME_URL}` не '
+            'записывает в БД устаревшие данные пользователя из кэша.'
+        )
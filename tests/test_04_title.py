@@ -4,7 +4,7 @@ import pytest
 
 from tests.utils import (
     check_pagination, check_permissions, create_categories, create_genre,
-    create_titles
+    create_single_review, create_titles
 )
 
 
@@ -353,3 +353,74 @@ class Test04TitleAPI:
             f'Проверьте, что PUT-запрос к `{self.TITLES_DETAIL_URL_TEMPLATE} '
             'не предусмотрен и возвращает статус 405.'
         )
+
+    def test_07_cached_title_refreshes_for_padded_id(self, client,
+                                                     admin_client,
+                                                     user_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=f'0{title_id}')
+        assert client.get(url).json()['rating'] is None
+        create_single_review(user_client, title_id, 'Отзыв', 6)
+        assert client.get(url).json()['rating'] == 6, (
+            'Проверьте, что кэш ответа на `/titles/0{id}/` сбрасывается '
+            'вместе с кэшем `/titles/{id}/`.'
+        )
+
+    def test_08_titles_search(self, client, admin_client):
+        from reviews.models import Genre
+
+        titles, _, genres = create_titles(admin_client)
+        response = admin_client.post(self.TITLES_URL, data={
+            'name': 'Драма на охоте',
+            'year': 1884,
+            'genre': [genres[0]['slug']],
+            'category': titles[0]['category'],
+        })
+        assert response.status_code == HTTPStatus.CREATED
+        drama_id = response.json()['id']
+
+        def search(query):
+            response = client.get(self.TITLES_URL, {'search': query})
+            assert response.status_code == HTTPStatus.OK
+            return [title['id'] for title in response.json()['results']]
+
+        assert search('Терминатор') == [titles[0]['id']], (
+            f'Проверьте, что `{self.TITLES_URL}?search=` ищет по названию.'
+        )
+        assert search('1988') == [titles[1]['id']], (
+            f'Проверьте, что `{self.TITLES_URL}?search=` ищет по году.'
+        )
+        assert search('комедия') == [titles[0]['id']], (
+            f'Проверьте, что `{self.TITLES_URL}?search=` ищет по названиям '
+            'жанров.'
+        )
+        assert search('драма') == [drama_id, titles[1]['id']], (
+            'Проверьте, что совпадение в названии произведения выводится '
+            'раньше совпадения в жанре.'
+        )
+        assert search('Крепкий Терминатор') == [], (
+            'Проверьте, что произведение должно подходить под все слова '
+            'запроса.'
+        )
+
+        response = admin_client.patch(
+            self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id']),
+            data={'name': 'Робокоп'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        genre = Genre.objects.get(slug=genres[1]['slug'])
+        genre.name = 'Фантастика'
+        genre.save()
+        assert search('робокоп') == [titles[0]['id']], (
+            'Проверьте, что после переименования произведение ищется по '
+            'новому названию.'
+        )
+        assert search('терминатор') == [] and search('комедия') == [], (
+            'Проверьте, что после переименования произведение не ищется по '
+            'старому названию и старому названию жанра.'
+        )
+        assert search('фантастика') == [titles[0]['id']], (
+            'Проверьте, что после переименования жанра произведение ищется '
+            'по новому названию жанра.'
+        )
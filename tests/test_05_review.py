@@ -413,3 +413,170 @@ class Test05ReviewAPI:
             f'Проверьте, что PUT-запрос к `{self.REVIEW_DETAIL_URL_TEMPLATE} '
             'не предусмотрен и возвращает статус 405.'
         )
+
+    def test_07_reviews_keep_title_rating(self, admin_client, user_client,
+                                          moderator_client):
+        from reviews.models import Review, Title
+        from reviews.ratings import find_rating_mismatches
+
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        title_url = self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id)
+        for client, score in ((admin_client, 4), (user_client, 8)):
+            create_single_review(client, title_id, 'Отзыв', score)
+        assert admin_client.get(title_url).json()['rating'] == 6, (
+            'Проверьте, что рейтинг учитывает новые отзывы.'
+        )
+
+        review = Review.objects.get(title_id=title_id, score=8)
+        response = user_client.patch(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=title_id, review_id=review.pk
+            ),
+            data={'score': 2}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert admin_client.get(title_url).json()['rating'] == 3, (
+            'Проверьте, что рейтинг учитывает изменение оценки.'
+        )
+
+        # Отзыв, загруженный частично, собранный вручную или изменённый
+        # в двух копиях, не должен сбивать сохранённый рейтинг.
+        Review.objects.only('id').get(pk=review.pk).save()
+        Review(pk=review.pk, author=review.author, title_id=title_id,
+               text=review.text, score=2, pub_date=review.pub_date).save()
+        first, second = Review.objects.get(pk=review.pk), Review.objects.get(
+            pk=review.pk
+        )
+        first.score = 9
+        first.save()
+        second.score = 10
+        second.save()
+        assert not find_rating_mismatches().exists(), (
+            'Проверьте, что рейтинг пересчитывается по отзывам в БД.'
+        )
+        assert admin_client.get(title_url).json()['rating'] == 7
+
+        review.refresh_from_db()
+        review.title_id = titles[1]['id']
+        review.save()
+        assert not find_rating_mismatches().exists(), (
+            'Проверьте, что при переносе отзыва пересчитываются оба '
+            'произведения.'
+        )
+
+        response = moderator_client.delete(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=titles[1]['id'], review_id=review.pk
+            )
+        )
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        title = Title.objects.get(pk=titles[1]['id'])
+        assert (title.rating_sum, title.rating_count) == (0, 0), (
+            'Проверьте, что рейтинг учитывает удаление отзыва.'
+        )
+        assert admin_client.get(title_url).json()['rating'] == 4
+
+    def test_08_rebuild_ratings_command(self, admin_client, user_client):
+        from django.core.management import CommandError, call_command
+
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'Отзыв', 7)
+        call_command('rebuild_ratings', check=True)
+        Title.objects.update(rating_sum=0, rating_count=0)
+        with pytest.raises(CommandError):
+            call_command('rebuild_ratings', check=True)
+        call_command('rebuild_ratings')
+        call_command('rebuild_ratings', check=True)
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (7, 1), (
+            'Проверьте, что rebuild_ratings восстанавливает рейтинг.'
+        )
+
+    def test_09_author_rename_refreshes_reviews(self, content, client,
+                                                admin_client, user,
+                                                user_client):
+        _, _, titles = content
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        etag = user_client.get(url)['ETag']
+        client.get(url)
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'username': 'renamed'}
+        )
+        assert response.status_code == HTTPStatus.OK
+
+        response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после переименования автора ETag отзывов '
+            'меняется.'
+        )
+        for response in (response, client.get(url)):
+            authors = {review['author'] for review in response.json()[
+                'results']}
+            assert 'renamed' in authors and user.username not in authors, (
+                'Проверьте, что в отзывах выводится новое имя автора.'
+            )
+
+    def test_10_reviews_keyset_pagination(self, content, user_client,
+                                          monkeypatch):
+        from base64 import b64encode
+
+        from django.utils import timezone
+
+        from api.pagination import KeysetPagination
+        from reviews.models import Review
+
+        _, reviews, titles = content
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        monkeypatch.setattr(KeysetPagination, 'page_size', 2)
+        # Одинаковая дата: порядок внутри неё задаёт id.
+        Review.objects.update(pub_date=timezone.now())
+        newest, middle, oldest = (
+            review['id'] for review in reversed(reviews)
+        )
+
+        response = user_client.get(url, {'cursor': ''})
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert [review['id'] for review in data['results']] == [
+            newest, middle
+        ], (
+            'Проверьте, что с параметром `cursor` отзывы выводятся от новых '
+            'к старым, а при равной дате — по убыванию id.'
+        )
+        assert data['previous'] is None and data['next'], (
+            'Проверьте, что у первой страницы есть только ссылка `next`.'
+        )
+
+        data = user_client.get(data['next']).json()
+        assert [review['id'] for review in data['results']] == [oldest], (
+            'Проверьте, что ссылка `next` продолжает выборку после '
+            'последнего отзыва страницы, даже при равной дате.'
+        )
+        assert data['next'] is None and data['previous']
+
+        data = user_client.get(data['previous']).json()
+        assert [review['id'] for review in data['results']] == [
+            newest, middle
+        ], (
+            'Проверьте, что ссылка `previous` возвращает предыдущую страницу.'
+        )
+        assert data['previous'] is None and data['next']
+
+        for cursor in ('не курсор', b64encode(b'[1]').decode(),
+                       b64encode(b'["not a date", 1, false]').decode()):
+            response = user_client.get(url, {'cursor': cursor})
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                'Проверьте, что на неверный курсор API отвечает 404.'
+            )
+
+    def test_11_reviews_of_missing_title(self, user_client):
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=999)
+        for params in ({}, {'cursor': ''}):
+            response = user_client.get(url, params)
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                'Проверьте, что GET-запрос к отзывам несуществующего '
+                'произведения возвращает ответ со статусом 404.'
+            )
@@ -0,0 +1,326 @@
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_comments, create_titles
+
+
+def create_many_titles(count):
+    from reviews.models import Category, Genre, Title
+
+    category = Category.objects.create(name='Сериал', slug='series')
+    genres = [
+        Genre.objects.create(name=f'Жанр {idx}', slug=f'genre-{idx}')
+        for idx in range(3)
+    ]
+    for idx in range(count):
+        title = Title.objects.create(
+            name=f'Произведение {idx}', year=2000, category=category
+        )
+        title.genre.set(genres)
+
+
+def create_title_with_reviews(name, reviews, comments=0):
+    from reviews.models import Category, Comment, Review, Title
+    from users.models import CustomUser
+
+    category, _ = Category.objects.get_or_create(name='Сериал', slug='series')
+    title = Title.objects.create(name=name, year=2000, category=category)
+    for idx in range(reviews):
+        author, _ = CustomUser.objects.get_or_create(
+            username=f'author_{idx}', email=f'author_{idx}@yamdb.fake'
+        )
+        review = Review.objects.create(
+            title=title, author=author, text='Отзыв', score=idx % 10 + 1
+        )
+        Comment.objects.bulk_create([
+            Comment(review=review, author=author, text='Комментарий')
+            for _ in range(comments)
+        ])
+    return title
+
+
+def capture_queries(action):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as context:
+        action()
+    return [query['sql'] for query in context.captured_queries]
+
+
+def count_queries(action):
+    return len(capture_queries(action))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08QueryCount:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLES_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    # Включая запросы штампа версии для ETag.
+    TITLES_LIST_QUERIES = 5
+    TITLES_DETAIL_QUERIES = 3
+    NOT_MODIFIED_QUERIES = 1
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    # Список: штамп версии, COUNT(*) и страница с авторами; объект: штамп
+    # версии и объект с автором.
+    REVIEWS_LIST_QUERIES = 3
+    REVIEW_DETAIL_QUERIES = 2
+    COMMENTS_LIST_QUERIES = 3
+    COMMENT_DETAIL_QUERIES = 2
+    # Объект с автором, прежние произведение и оценка отзыва, UPDATE
+    # отзыва и сдвиг рейтинга произведения.
+    REVIEW_PATCH_QUERIES = 4
+    USERS_ME_URL = '/api/v1/users/me/'
+
+    # Запросы с токеном не попадают в кэш ответов для анонимов, поэтому
+    # количество запросов к БД проверяется от имени пользователя.
+    def test_01_titles_list_query_count(self, user_client, admin_client,
+                                        django_assert_num_queries):
+        create_titles(admin_client)
+        # Первый запрос заполняет счётчик строк, кэш количества и кэш
+        # пользователя.
+        user_client.get(self.TITLES_URL)
+        with django_assert_num_queries(self.TITLES_LIST_QUERIES):
+            user_client.get(self.TITLES_URL)
+
+        create_many_titles(20)
+        with django_assert_num_queries(self.TITLES_LIST_QUERIES):
+            user_client.get(self.TITLES_URL)
+        with django_assert_num_queries(self.TITLES_LIST_QUERIES):
+            user_client.get(self.TITLES_URL, {'page': 3})
+
+    def test_02_titles_detail_query_count(self, user_client, admin_client,
+                                          django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        url = self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        user_client.get(self.USERS_ME_URL)
+        with django_assert_num_queries(self.TITLES_DETAIL_QUERIES):
+            user_client.get(url)
+
+    def test_03_authenticated_user_is_cached(self, user, user_client,
+                                             admin_client,
+                                             django_assert_num_queries):
+        user_client.get(self.USERS_ME_URL)
+        with django_assert_num_queries(0):
+            response = user_client.get(self.USERS_ME_URL)
+        assert response.json()['role'] == 'user'
+
+        admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'bio': 'Новая биография'}
+        )
+        response = user_client.get(self.USERS_ME_URL)
+        assert response.json()['bio'] == 'Новая биография', (
+            'Проверьте, что изменение пользователя сбрасывает кэш '
+            'аутентификации.'
+        )
+
+    def test_04_titles_conditional_get(self, client, user_client,
+                                       admin_client,
+                                       django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        url = self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        response = user_client.get(url)
+        etag = response.get('ETag')
+        assert etag, (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит ETag.'
+        )
+
+        with django_assert_num_queries(self.NOT_MODIFIED_QUERIES):
+            response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            'Проверьте, что запрос с актуальным If-None-Match получает '
+            'ответ 304.'
+        )
+
+        admin_client.post(
+            f'{url}reviews/', data={'text': 'Отзыв', 'score': 7}
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что новый отзыв меняет ETag произведения.'
+        )
+        assert response.json()['rating'] == 7
+
+    def test_05_anonymous_responses_are_cached(self, client, admin_client,
+                                               django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        url = self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        other_url = self.TITLES_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[1]['id']
+        )
+        client.get(url)
+        client.get(other_url)
+        with django_assert_num_queries(0):
+            response = client.get(url)
+        assert response.status_code == 200
+
+        admin_client.post(
+            f'{url}reviews/', data={'text': 'Отзыв', 'score': 3}
+        )
+        assert client.get(url).json()['rating'] == 3, (
+            'Проверьте, что новый отзыв сбрасывает кэш ответов произведения.'
+        )
+        with django_assert_num_queries(0):
+            client.get(other_url)
+
+    def test_06_list_queries_use_indexes(self, admin, admin_client, user,
+                                         user_client):
+        from django.db import connection
+
+        if connection.vendor != 'sqlite':
+            # На десятках строк PostgreSQL выбирает план по стоимости, а
+            # не по индексам; его разбор плана проверяет test_12.
+            pytest.skip('Сценарии explain_queries проверяются на SQLite')
+        create_comments(admin_client, {admin: admin_client, user: user_client})
+        create_many_titles(20)
+        # Команда завершается CommandError, если какой-либо запрос
+        # списков API просматривает таблицу целиком.
+        call_command('explain_queries')
+
+    def test_07_reviews_and_comments_query_count(self, content, user,
+                                                 user_client,
+                                                 django_assert_num_queries):
+        comments, reviews, titles = content
+        reviews_url = self.REVIEWS_URL_TEMPLATE.format(
+            title_id=titles[0]['id']
+        )
+        user_review = next(
+            review for review in reviews if review['author'] == user.username
+        )
+        review_url = f'{reviews_url}{reviews[0]["id"]}/'
+        comments_url = f'{review_url}comments/'
+        expected = (
+            (reviews_url, self.REVIEWS_LIST_QUERIES),
+            (review_url, self.REVIEW_DETAIL_QUERIES),
+            (comments_url, self.COMMENTS_LIST_QUERIES),
+            (f'{comments_url}{comments[0]["id"]}/',
+             self.COMMENT_DETAIL_QUERIES),
+        )
+        user_client.get(self.USERS_ME_URL)
+        # Авторы разные, поэтому лишний запрос на каждого автора в списке
+        # изменил бы количество запросов.
+        for url, queries in expected:
+            with django_assert_num_queries(queries):
+                response = user_client.get(url)
+            assert response.status_code == 200
+
+        with django_assert_num_queries(self.REVIEW_PATCH_QUERIES):
+            response = user_client.patch(
+                f'{reviews_url}{user_review["id"]}/', data={'text': 'Новый'}
+            )
+        assert response.status_code == 200
+
+    def test_08_titles_expand_is_capped(self, content, user_client, settings,
+                                        django_assert_num_queries):
+        comments, reviews, titles = content
+        url = self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        settings.EXPAND_REVIEWS_LIMIT = 2
+        data = user_client.get(url, {'expand': 'reviews'}).json()
+        assert [review['id'] for review in data['reviews']] == [
+            reviews[2]['id'], reviews[1]['id']
+        ], (
+            'Проверьте, что `?expand=reviews` встраивает не больше '
+            '`EXPAND_REVIEWS_LIMIT` самых новых отзывов.'
+        )
+
+        settings.EXPAND_REVIEWS_LIMIT = 3
+        settings.EXPAND_COMMENTS_LIMIT = 2
+        data = user_client.get(url, {'expand': 'comments'}).json()
+        assert [
+            comment['id'] for comment in data['reviews'][-1]['comments']
+        ] == [comments[2]['id'], comments[1]['id']], (
+            'Проверьте, что `?expand=comments` встраивает не больше '
+            '`EXPAND_COMMENTS_LIMIT` самых новых комментариев.'
+        )
+
+        create_many_titles(20)
+        user_client.get(self.TITLES_URL, {'expand': 'comments'})
+        # Одна выборка отзывов и одна комментариев для всей страницы;
+        # без отзывов комментарии не выбираются.
+        with django_assert_num_queries(self.TITLES_LIST_QUERIES + 1):
+            response = user_client.get(
+                self.TITLES_URL, {'expand': 'comments', 'page': 2}
+            )
+        assert all(
+            title['reviews'] == [] for title in response.json()['results']
+        )
+        with django_assert_num_queries(self.TITLES_LIST_QUERIES + 2):
+            response = user_client.get(self.TITLES_URL, {'expand': 'comments'})
+        assert len(response.json()['results'][0]['reviews']) == 3
+
+    def test_09_title_delete_query_count(self):
+        from reviews.models import Title
+
+        small = create_title_with_reviews('Маленькое', 1, comments=1)
+        large = create_title_with_reviews('Большое', 10, comments=5)
+        assert count_queries(small.delete) == count_queries(large.delete), (
+            'Проверьте, что при удалении произведения рейтинг, штамп и кэш '
+            'не обновляются для каждого удаляемого отзыва и комментария.'
+        )
+        assert not Title.objects.exists()
+
+    def test_10_review_delete_touches_title_once(self):
+        from reviews.models import Review, Title
+
+        title = create_title_with_reviews('Произведение', 2, comments=20)
+        modified = Title.objects.get(pk=title.pk).modified
+        review = Review.objects.filter(title=title).first()
+        title_updates = [
+            sql for sql in capture_queries(review.delete)
+            if sql.startswith('UPDATE "reviews_title"')
+        ]
+        assert len(title_updates) == 1, (
+            'Проверьте, что при удалении отзыва штамп произведения '
+            'обновляется один раз, а не для каждого комментария.'
+        )
+        title = Title.objects.get(pk=title.pk)
+        assert title.modified > modified and title.rating_count == 1
+
+    def test_11_review_delete_query_count(self, client):
+        from reviews.models import Comment, Review
+
+        title = create_title_with_reviews('Произведение', 2, comments=20)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title.pk)
+        assert len(client.get(url).json()['results']) == 2
+        few, many = Review.objects.filter(title=title).order_by('id')
+        comments = Comment.objects.filter(review=few)
+        comments.exclude(pk=comments.first().pk).delete()
+        assert count_queries(few.delete) == count_queries(many.delete), (
+            'Проверьте, что при удалении отзыва не выполняются запросы для '
+            'каждого удаляемого комментария.'
+        )
+        assert client.get(url).json()['results'] == [], (
+            'Проверьте, что после удаления отзывов кэш ответов сброшен.'
+        )
+
+    def test_12_explain_reports_unindexed_scans(self):
+        from django.db import connection
+
+        from api.management.commands.explain_queries import explain_sqlite
+        from reviews.models import Title
+
+        if connection.vendor != 'sqlite':
+            pytest.skip('Разбор плана SQLite')
+
+        def scans(queryset):
+            sql, params = queryset.query.sql_with_params()
+            with connection.cursor() as cursor:
+                return explain_sqlite(cursor, sql, params)[1]
+
+        titles = Title.objects.all()
+        assert scans(titles.order_by('description')), (
+            'Проверьте, что explain_queries сообщает о сортировке всей '
+            'таблицы по столбцу без индекса, даже без WHERE.'
+        )
+        assert scans(titles.order_by('description')[:5]), (
+            'Проверьте, что LIMIT не скрывает сортировку всей таблицы.'
+        )
+        assert not scans(titles.order_by('id')[:5]), (
+            'Проверьте, что страница в порядке первичного ключа не считается '
+            'полным просмотром.'
+        )
+        assert not scans(titles.filter(year=1984))
+        assert not scans(titles.order_by('year').values('year', 'id')), (
+            'Проверьте, что просмотр покрывающего индекса допустим.'
+        )
@@ -0,0 +1,110 @@
+from http import HTTPStatus
+
+import pytest
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09ModerationAPI:
+
+    REVIEWS_URL = '/api/v1/moderation/reviews/'
+    COMMENTS_URL = '/api/v1/moderation/comments/'
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+
+    def test_01_moderation_permissions(self, content, client, user_client,
+                                       moderator_client, admin_client):
+        _, _, titles = content
+        data = {'title': titles[0]['id']}
+        response = client.post(self.REVIEWS_URL, data=data)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что массовая модерация недоступна анониму.'
+        )
+        response = user_client.post(self.REVIEWS_URL, data=data)
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что массовая модерация недоступна пользователю.'
+        )
+        for moderator_or_admin in (moderator_client, admin_client):
+            response = moderator_or_admin.post(self.REVIEWS_URL)
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                'Проверьте, что без условий отбора возвращается код 400.'
+            )
+
+    def test_02_moderation_edit(self, content, moderator_client):
+        from reviews.models import Comment
+
+        comments, _, titles = content
+        response = moderator_client.post(self.COMMENTS_URL, data={
+            'title': titles[0]['id'], 'action': 'edit'
+        }, format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что для правки обязателен новый текст.'
+        )
+        response = moderator_client.post(self.COMMENTS_URL, data={
+            'title': titles[0]['id'], 'action': 'edit', 'text': 'Скрыто'
+        }, format='json')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == {'updated': len(comments)}
+        assert set(Comment.objects.values_list('text', flat=True)) == {
+            'Скрыто'
+        }
+
+    def test_03_moderation_delete(self, content, moderator_client,
+                                  user_client, settings):
+        from reviews.models import Comment, Review, Title
+
+        _, reviews, titles = content
+        title_id = titles[0]['id']
+        # Пачка из одной записи: удаление идёт в несколько DELETE, а
+        # рейтинг пересчитывается один раз в конце.
+        settings.MODERATION_CHUNK_SIZE = 1
+        deleted_ids = [reviews[0]['id'], reviews[1]['id']]
+        response = moderator_client.post(
+            self.REVIEWS_URL, data={'ids': deleted_ids}, format='json'
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == {'deleted': len(deleted_ids)}
+        assert not Review.objects.filter(pk__in=deleted_ids).exists()
+        assert not Comment.objects.exists(), (
+            'Проверьте, что вместе с отзывами удаляются комментарии к ним.'
+        )
+        title = Title.objects.get(pk=title_id)
+        assert (title.rating_count, title.rating_sum) == (1, 5), (
+            'Проверьте, что рейтинг пересчитан после удаления отзывов.'
+        )
+        response = user_client.get(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id)
+        )
+        assert response.json()['rating'] == 5
+
+    def test_04_moderation_delete_by_author(self, content, user,
+                                            moderator_client):
+        from reviews.models import Review
+
+        response = moderator_client.post(
+            self.REVIEWS_URL, data={'author': user.username}, format='json'
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == {'deleted': 1}
+        assert not Review.objects.filter(author=user).exists()
+        assert Review.objects.count() == len(content[1]) - 1
+
+    def test_05_delete_rows_respects_query_param_limit(self, content,
+                                                       monkeypatch):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from reviews.models import Comment
+        from reviews.moderation import delete_rows
+
+        comments, _, _ = content
+        monkeypatch.setattr(connection.features, 'max_query_params', 2)
+        with CaptureQueriesContext(connection) as context:
+            deleted = delete_rows(
+                Comment, 'id', [comment['id'] for comment in comments]
+            )
+        assert deleted == len(comments)
+        assert not Comment.objects.exists()
+        # Три комментария при лимите в два параметра: два DELETE.
+        assert len(context.captured_queries) == 2, (
+            'Проверьте, что delete_rows передаёт в запрос не больше '
+            '`max_query_params` параметров.'
+        )
@@ -0,0 +1,130 @@
+import pytest
+from django.core.management import call_command
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10Database:
+
+    USERS_ME_URL = '/api/v1/users/me/'
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_replica_router(self, settings):
+        from django.db import transaction
+
+        from api_yamdb.db import ReplicaRouter, reset_replica_pin
+        from reviews.models import Title
+        from users.models import ConfirmationCode, CustomUser
+
+        router = ReplicaRouter()
+        reset_replica_pin()
+        assert router.db_for_read(Title) is None, (
+            'Проверьте, что без реплик роутер не выбирает БД.'
+        )
+        settings.DATABASE_REPLICAS = ['replica_0']
+        assert router.db_for_read(Title) == 'replica_0'
+        assert not router.allow_migrate('replica_0', 'reviews')
+        for model in (CustomUser, ConfirmationCode):
+            assert router.db_for_read(model) == 'default', (
+                'Проверьте, что пользователи и коды подтверждения читаются '
+                'с default.'
+            )
+        with transaction.atomic():
+            assert router.db_for_read(Title) == 'default', (
+                'Проверьте, что внутри транзакции чтение идёт в default.'
+            )
+
+        assert router.db_for_write(Title) == 'default'
+        assert router.db_for_read(Title) == 'default', (
+            'Проверьте, что после записи запрос читает с default.'
+        )
+        reset_replica_pin()
+        assert router.db_for_read(Title) == 'replica_0', (
+            'Проверьте, что новый запрос снова читает с реплик.'
+        )
+
+    def test_02_replica_pin_is_reset_per_request(self, user_client, settings):
+        from api_yamdb.db import ReplicaRouter
+        from reviews.models import Title
+
+        # Запись в тесте закрепляет чтение за default до начала запроса.
+        ReplicaRouter().db_for_write(Title)
+        user_client.get(self.USERS_ME_URL)
+        settings.DATABASE_REPLICAS = ['replica_0']
+        assert ReplicaRouter().db_for_read(Title) == 'replica_0'
+
+    def test_03_connection_health_check(self, user_client, monkeypatch):
+        from django.db import connection
+
+        user_client.get(self.USERS_ME_URL)
+        assert connection.connection is not None, (
+            'Проверьте, что соединение с БД переживает запрос.'
+        )
+        # Тестовую БД SQLite в памяти Django не закрывает, поэтому
+        # проверяется сам вызов close().
+        closed = []
+        monkeypatch.setitem(connection.settings_dict, 'CONN_HEALTH_CHECKS',
+                            True)
+        monkeypatch.setattr(connection, 'is_usable', lambda: False)
+        monkeypatch.setattr(connection, 'close', lambda: closed.append(1))
+        response = user_client.get(self.USERS_ME_URL)
+        assert response.status_code == 200
+        assert closed, (
+            'Проверьте, что неработающее соединение закрывается перед '
+            'запросом.'
+        )
+
+    def test_04_sqlite_pragmas(self, settings, tmp_path):
+        from django.db import connection
+
+        if connection.vendor != 'sqlite':
+            pytest.skip('PRAGMA применяются только к SQLite')
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            busy_timeout, = cursor.fetchone()
+        assert busy_timeout == settings.SQLITE_PRAGMAS['busy_timeout'], (
+            'Проверьте, что SQLITE_PRAGMAS применяются к соединению.'
+        )
+        call_command(
+            'benchmark_sqlite', duration=0.2, rows=100, dir=str(tmp_path)
+        )
+
+    def test_05_count_cache_survives_version_eviction(self, admin_client,
+                                                      user_client):
+        from django.core.cache import cache
+
+        from reviews.counters import get_version_key
+        from reviews.models import Title
+        from tests.utils import create_titles
+
+        titles, _, _ = create_titles(admin_client)
+        params = {'year': titles[0]['year']}
+        cache.clear()
+        assert user_client.get(self.TITLES_URL, params).json()['count'] == 1
+        Title.objects.create(
+            name='Терминатор 2', year=titles[0]['year'],
+            category_id=Title.objects.get(pk=titles[0]['id']).category_id
+        )
+        assert user_client.get(self.TITLES_URL, params).json()['count'] == 2
+        cache.delete(get_version_key(Title))
+        assert user_client.get(self.TITLES_URL, params).json()['count'] == 2, (
+            'Проверьте, что после вытеснения версии из кэша не '
+            'возвращаются количества, закэшированные под прежними версиями.'
+        )
+
+    def test_06_rebuild_counts_command(self, admin_client, user_client):
+        from django.core.management import CommandError
+
+        from reviews.models import TableCounter
+        from tests.utils import create_titles
+
+        create_titles(admin_client)
+        assert user_client.get(self.TITLES_URL).json()['count'] == 2
+        call_command('rebuild_counts', check=True)
+        TableCounter.objects.filter(model='reviews.title').update(count=100)
+        with pytest.raises(CommandError):
+            call_command('rebuild_counts', check=True)
+        call_command('rebuild_counts')
+        call_command('rebuild_counts', check=True)
+        assert user_client.get(self.TITLES_URL).json()['count'] == 2, (
+            'Проверьте, что rebuild_counts восстанавливает счётчики строк.'
+        )
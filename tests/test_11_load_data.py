@@ -0,0 +1,120 @@
+import csv
+import io
+import os
+import shutil
+
+import pytest
+from django.core.management import call_command
+
+from tests.conftest import MANAGE_PATH
+
+DATA_PATH = os.path.join(MANAGE_PATH, 'static', 'data')
+
+
+def copy_data(tmp_path):
+    folder = tmp_path / 'data'
+    shutil.copytree(DATA_PATH, folder)
+    return folder
+
+
+def read_rows(file_path):
+    with open(file_path, newline='', encoding='utf-8') as csvfile:
+        return list(csv.reader(csvfile))
+
+
+def write_rows(file_path, rows):
+    with open(file_path, 'w', newline='', encoding='utf-8') as csvfile:
+        csv.writer(csvfile).writerows(rows)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11LoadData:
+
+    def test_01_parallel_chunked_import_resumes(self, tmp_path):
+        from reviews.models import Review
+
+        folder = copy_data(tmp_path)
+        review_path = folder / 'review.csv'
+        rows = read_rows(review_path)
+        # Отзыв сразу после третьей пачки ссылается на несуществующее
+        # произведение, и загрузка прерывается на четвёртой пачке.
+        broken = [row.copy() for row in rows]
+        broken[31][1] = '999'
+        write_rows(review_path, broken)
+        command = (
+            'load_data', str(folder), '--chunked', '--batch-size', '10',
+            '--workers', '2'
+        )
+
+        call_command(*command)
+        assert Review.objects.count() == 30, (
+            'Проверьте, что пачки до ошибки зафиксированы.'
+        )
+        assert os.path.exists(folder / '.load_data_checkpoint.json'), (
+            'Проверьте, что после ошибки прогресс сохраняется в checkpoint.'
+        )
+
+        write_rows(review_path, rows)
+        call_command(*command)
+        assert Review.objects.count() == len(rows) - 1, (
+            'Проверьте, что повторный запуск `load_data --chunked '
+            '--workers` догружает отзывы, уже записанные до ошибки.'
+        )
+        assert not os.path.exists(folder / '.load_data_checkpoint.json')
+        call_command('rebuild_ratings', check=True)
+
+    def test_02_chunked_import_resumes(self, tmp_path):
+        from reviews.models import Comment, Review
+
+        folder = copy_data(tmp_path)
+        review_path = folder / 'review.csv'
+        rows = read_rows(review_path)
+        broken = [row.copy() for row in rows]
+        broken[25][3] = '999'
+        write_rows(review_path, broken)
+        command = ('load_data', str(folder), '--chunked', '--batch-size', '10')
+
+        out = io.StringIO()
+        call_command(*command, stdout=out)
+        assert 'User 999 does not exist' in out.getvalue(), (
+            'Проверьте, что `load_data` сообщает о ссылке на '
+            'несуществующую запись.'
+        )
+        assert Review.objects.count() == 20
+
+        write_rows(review_path, rows)
+        call_command(*command)
+        assert Review.objects.count() == len(rows) - 1, (
+            'Проверьте, что повторный запуск `load_data --chunked` '
+            'продолжает загрузку с сохранённой пачки.'
+        )
+        assert Comment.objects.count() == len(
+            read_rows(folder / 'comments.csv')
+        ) - 1
+        call_command('rebuild_ratings', check=True)
+
+    def test_03_bulk_import(self):
+        from reviews.models import Category, Comment, Genre, Review, Title
+        from users.models import CustomUser
+
+        call_command('load_data', DATA_PATH, '--bulk')
+        for model, file_name in (
+                (Category, 'category'), (Genre, 'genre'), (Title, 'titles'),
+                (CustomUser, 'users'), (Review, 'review'),
+                (Comment, 'comments')):
+            rows = read_rows(os.path.join(DATA_PATH, f'{file_name}.csv'))
+            assert model.objects.count() == len(rows) - 1, (
+                f'Проверьте, что `load_data --bulk` загружает все строки '
+                f'{file_name}.csv.'
+            )
+        genre_titles = {
+            (int(title_id), int(genre_id)) for _, title_id, genre_id in
+            read_rows(os.path.join(DATA_PATH, 'genre_title.csv'))[1:]
+        }
+        assert set(Title.genre.through.objects.values_list(
+            'title_id', 'genre_id'
+        )) == genre_titles, (
+            'Проверьте, что `load_data --bulk` связывает произведения с '
+            'жанрами из genre_title.csv.'
+        )
+        call_command('rebuild_ratings', check=True)
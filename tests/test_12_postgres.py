@@ -0,0 +1,159 @@
+import os
+import threading
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_titles
+
+
+@pytest.mark.postgres
+@pytest.mark.skipif(
+    'postgresql' not in os.getenv('DB_ENGINE', ''),
+    reason='Тесты PostgreSQL запускаются с DB_ENGINE=postgresql'
+)
+@pytest.mark.django_db(transaction=True)
+class Test12Postgres:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def search(self, client, query):
+        response = client.get(self.TITLES_URL, {'search': query})
+        assert response.status_code == HTTPStatus.OK
+        return [title['id'] for title in response.json()['results']]
+
+    def test_01_settings_use_postgresql(self, settings):
+        from django.db import connection
+
+        from reviews.search import PostgresSearchBackend, get_search_backend
+
+        assert connection.vendor == 'postgresql', (
+            'Проверьте, что DB_ENGINE из окружения попадает в настройку '
+            '`DATABASES`.'
+        )
+        assert settings.DATABASES['default']['USER'] == os.getenv(
+            'POSTGRES_USER'
+        )
+        assert isinstance(get_search_backend(), PostgresSearchBackend)
+
+    def test_02_search_index(self, client, admin_client):
+        from django.db import connection
+
+        from reviews.search import SEARCH_TABLE
+
+        titles, _, _ = create_titles(admin_client)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM {SEARCH_TABLE} '
+                f'WHERE title_id = ANY(%s)',
+                ([title['id'] for title in titles],)
+            )
+            assert cursor.fetchone()[0] == len(titles), (
+                'Проверьте, что новые произведения попадают в индекс '
+                'tsvector.'
+            )
+        assert self.search(client, 'Терм') == [titles[0]['id']], (
+            'Проверьте, что на PostgreSQL поиск находит слово по началу.'
+        )
+        assert self.search(client, 'крепкий 1988') == [titles[1]['id']]
+        assert self.search(client, 'Крепкий Терминатор') == []
+
+    def test_03_search_index_migrations(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        call_command('migrate', 'reviews', '0005', verbosity=0)
+        call_command('migrate', 'reviews', verbosity=0)
+        assert self.search(client, 'орешек') == [titles[1]['id']], (
+            'Проверьте, что миграция индекса заполняет его на PostgreSQL.'
+        )
+        response = admin_client.delete(
+            f'{self.TITLES_URL}{titles[1]["id"]}/'
+        )
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.search(client, 'орешек') == []
+
+    def test_04_claim_emails_skips_locked_rows(self, settings):
+        from django.db import connection, transaction
+
+        from users.emails import claim_emails, send_email
+        from users.models import OutgoingEmail
+
+        settings.EMAIL_OUTBOX_ENABLED = True
+        for recipient in ('first@yamdb.fake', 'second@yamdb.fake'):
+            send_email('Тема', 'Текст', recipient)
+        locked_email = OutgoingEmail.objects.get(recipient='first@yamdb.fake')
+        locked = threading.Event()
+        release = threading.Event()
+
+        def lock_email():
+            try:
+                with transaction.atomic():
+                    list(OutgoingEmail.objects.select_for_update().filter(
+                        pk=locked_email.pk
+                    ))
+                    locked.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        worker = threading.Thread(target=lock_email)
+        worker.start()
+        try:
+            assert locked.wait(10)
+            claimed = claim_emails(batch_size=10)
+        finally:
+            release.set()
+            worker.join()
+        assert [email.recipient for email in claimed] == [
+            'second@yamdb.fake'
+        ], (
+            'Проверьте, что обработчик пропускает письма, заблокированные '
+            'другим обработчиком, а не ждёт их.'
+        )
+
+    def test_05_username_prefix_uses_pattern_index(self, django_user_model):
+        from django.db import connection
+
+        for username in ('Alice', 'alicia', 'bob'):
+            django_user_model.objects.create_user(
+                username=username, email=f'{username}@yamdb.fake'
+            )
+        table = django_user_model._meta.db_table
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, table
+            )
+        assert any(
+            constraint['columns'] == ['username_lower']
+            and name.endswith('_like')
+            for name, constraint in constraints.items()
+        ), (
+            'Проверьте, что для поиска по началу username на PostgreSQL '
+            'есть индекс varchar_pattern_ops.'
+        )
+        users = django_user_model.objects.username_startswith('ALI')
+        assert 'LIKE' in str(users.query)
+        assert sorted(users.values_list('username', flat=True)) == [
+            'Alice', 'alicia'
+        ]
+
+    def test_06_explain_reports_unindexed_filters(self):
+        from django.db import connection
+
+        from api.management.commands.explain_queries import (
+            explain_postgresql
+        )
+        from reviews.models import Title
+
+        def scans(queryset):
+            sql, params = queryset.query.sql_with_params()
+            with connection.cursor() as cursor:
+                return explain_postgresql(cursor, sql, params)[1]
+
+        titles = Title.objects.all()
+        assert scans(titles.filter(description='I`ll be back')), (
+            'Проверьте, что explain_queries сообщает о фильтре по столбцу '
+            'без индекса на PostgreSQL.'
+        )
+        assert not scans(titles.filter(year=1984))
+        assert not scans(titles.order_by('id')[:5])